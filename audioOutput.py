@@ -0,0 +1,153 @@
+"""
+Callback-driven audio output.
+
+Synthesized float32 samples are copied once into a preallocated ring buffer; PortAudio pulls
+from it in a callback of FRAMES_PER_BUFFER frames (about 21 ms at 24 kHz) instead of the
+synthesizer making thousands of tiny blocking writes. flush() discards everything queued, so
+playback goes silent within one buffer period. Underruns (the callback finding less audio
+than it needed in the middle of an utterance) are counted, as is stop-to-silence latency: the
+time from flush() until the first silent buffer is handed to the device, plus the device's
+reported output latency.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pyaudio
+
+SAMPLE_RATE = 24000
+FRAMES_PER_BUFFER = 512
+RING_SECONDS = 4
+
+
+class AudioRingBuffer:
+    """ Single-producer / single-consumer float32 ring with blocking writes. """
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.read_pos = 0       # Total frames consumed
+        self.write_pos = 0      # Total frames produced
+        self.epoch = 0          # Bumped by clear() to abandon in-progress writes
+        self.cond = threading.Condition()
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def write(self, samples, is_current=None):
+        """
+        Copy samples into the ring, waiting for space as needed. Returns False if clear() was
+        called before everything was written (the remainder is dropped). is_current, if given,
+        is checked under the lock before each copy, so a writer racing clear() cannot slip
+        stale audio in after it.
+        """
+        offset, total = 0, len(samples)
+        with self.cond:
+            epoch = self.epoch
+            while offset < total:
+                while self.available() == self.capacity and self.epoch == epoch:
+                    self.cond.wait()
+                if self.epoch != epoch or (is_current is not None and not is_current()):
+                    return False
+                start = self.write_pos % self.capacity
+                count = min(total - offset, self.capacity - self.available(), self.capacity - start)
+                self.data[start:start + count] = samples[offset:offset + count]
+                self.write_pos += count
+                offset += count
+        return True
+
+    def read_into(self, out):
+        """ Fill `out` from the ring (zero-padding the rest); returns the number of frames read. """
+        with self.cond:
+            count = min(len(out), self.available())
+            start = self.read_pos % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self.data[start:start + first]
+            out[first:count] = self.data[:count - first]
+            self.read_pos += count
+            self.cond.notify_all()
+        out[count:] = 0.0
+        return count
+
+    def clear(self):
+        with self.cond:
+            self.read_pos = self.write_pos
+            self.epoch += 1
+            self.cond.notify_all()
+
+
+class AudioOutput:
+    def __init__(self, rate=SAMPLE_RATE, frames_per_buffer=FRAMES_PER_BUFFER, ring_seconds=RING_SECONDS):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.ring = AudioRingBuffer(int(rate * ring_seconds))
+        self.out = np.zeros(frames_per_buffer * 4, dtype=np.float32)   # Callback scratch buffer
+        self.in_utterance = False
+        self.stats = {"callbacks": 0, "frames_played": 0, "underruns": 0, "flushes": 0}
+        self.flushed_at = None                  # Set by flush() while audio was still queued
+        self.stop_latencies = deque(maxlen=100)
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=rate,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=self._callback,
+        )
+        self.stream.start_stream()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if frame_count > len(self.out):
+            self.out = np.zeros(frame_count, dtype=np.float32)
+        out = self.out[:frame_count]
+        played = self.ring.read_into(out)
+        self.stats["callbacks"] += 1
+        self.stats["frames_played"] += played
+        if played < frame_count and (played or self.in_utterance):
+            self.stats["underruns"] += 1
+        flushed_at = self.flushed_at
+        if flushed_at is not None and not played:
+            self.flushed_at = None
+            self.stop_latencies.append(time.perf_counter() - flushed_at + self.stream.get_output_latency())
+        return out.tobytes(), pyaudio.paContinue
+
+    @staticmethod
+    def as_samples(audio):
+        """ View synthesizer output (numpy array or CPU torch tensor) as flat float32 without copying. """
+        if hasattr(audio, "detach"):
+            audio = audio.detach().cpu().numpy()
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+    def begin_utterance(self):
+        self.in_utterance = True
+
+    def end_utterance(self):
+        self.in_utterance = False
+
+    def write(self, audio, is_current=None):
+        """ Queue audio for playback; blocks while the ring is full. Returns False if flushed meanwhile. """
+        return self.ring.write(self.as_samples(audio), is_current)
+
+    def flush(self):
+        """ Drop all queued audio; the next callback (within one buffer period) plays silence. """
+        if self.ring.available() or self.in_utterance:
+            self.flushed_at = time.perf_counter()
+        self.in_utterance = False
+        self.ring.clear()
+        self.stats["flushes"] += 1
+
+    def buffered_seconds(self):
+        return self.ring.available() / self.rate
+
+    def counters(self):
+        latencies = list(self.stop_latencies)
+        stop_ms = {"count": len(latencies),
+                   "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                   "max": round(max(latencies) * 1000, 1) if latencies else 0.0}
+        return dict(self.stats, buffered_ms=round(self.buffered_seconds() * 1000, 1), stop_to_silence_ms=stop_ms)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.p.terminate()
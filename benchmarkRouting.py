@@ -0,0 +1,226 @@
+"""
+Offline accuracy/latency benchmark for query routing.
+
+Replays the labelled corpus in benchmarks/routing_corpus.jsonl through the same steps as
+main.stream_generate_response (fast path -> detect_intent -> decision LLM) and reports:
+    - precision/recall of the detect_intent gate (tool vs. chit-chat)
+    - precision/recall per intent category (the expected function_map tool, or "none")
+    - p50/p99 routing latency for the local stages and the whole route
+
+The decision LLM is a stand-in that replays the recorded output of each corpus line, so the
+benchmark runs without network access. A recorded call to a tool that the router would not
+have been offered for the query's intent labels (executeTool.registry) counts as "none":
+
+    python benchmarkRouting.py
+    python benchmarkRouting.py --repeat 200 --llm-delay-ms 350
+    python benchmarkRouting.py --backend embedding
+
+The embedding backend is scored on held-out queries only: corpus queries that also appear in
+its training examples (data/intent_examples.json) are left out and counted in the report.
+"""
+import argparse
+import json
+import re
+import time
+
+from detectIntent import detect_intent, fast_route, intent_labels
+from executeTool import registry
+
+DEFAULT_CORPUS = "benchmarks/routing_corpus.jsonl"
+NO_TOOL = "none"
+
+
+def _normalise(text):
+    return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+
+
+def held_out(corpus, examples_file):
+    """ Split the corpus into (queries not among the classifier's training examples, overlapping ones). """
+    with open(examples_file, encoding="utf-8") as f:
+        training = {_normalise(u) for utterances in json.load(f).values() for u in utterances}
+    kept = [item for item in corpus if _normalise(item["query"]) not in training]
+    return kept, [item for item in corpus if _normalise(item["query"]) in training]
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    """
+    Read labelled queries: {"query": ..., "tool": "get_time" | null, "llm": "<recorded router output>"},
+    optionally with "args": the expected string arguments of the routed call.
+    """
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                corpus.append(json.loads(line))
+    return corpus
+
+
+class ReplayLLM:
+    """
+    Stand-in for the decision LLM: returns the recorded output for a query, optionally after
+    a fixed delay to model the network round trip. Unrecorded queries answer "no tool required".
+    """
+    def __init__(self, recordings, delay=0.0):
+        self.recordings = recordings
+        self.delay = delay
+        self.calls = 0
+        self.misses = 0
+
+    @classmethod
+    def from_corpus(cls, corpus, delay=0.0):
+        return cls({item["query"]: item.get("llm", "no tool required") for item in corpus}, delay)
+
+    def __call__(self, query):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if query not in self.recordings:
+            self.misses += 1
+            return "no tool required"
+        return self.recordings[query]
+
+
+_CALL_NAME = re.compile(r"([a-zA-Z_][a-zA-Z0-9_]*)\s*\(")
+_CALL_ARGS = re.compile(r'"([^"]*)"')
+
+
+def route(query, llm, backend="keywords"):
+    """
+    Route one query the way main.stream_generate_response does.
+    Returns (tool name or "none", stage, call string) where stage is "fast", "llm" or "gate".
+    """
+    call = fast_route(query)
+    if call:
+        stage = "fast"
+    else:
+        labels = intent_labels(query, backend)
+        if not labels:
+            return NO_TOOL, "gate", None
+        call = llm(query)
+        stage = "llm"
+
+    match = _CALL_NAME.search(call)
+    tool = match.group(1) if match else NO_TOOL
+    if stage == "llm" and tool != NO_TOOL and tool not in registry.relevant(labels):
+        return NO_TOOL, stage, call     # The router was never shown this tool
+    return tool, stage, call
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def precision_recall(tp, fp, fn):
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return precision, recall
+
+
+def run_benchmark(corpus, llm, repeat=1, backend="keywords"):
+    """ Route every query `repeat` times and collect accuracy counters and latency samples (seconds). """
+    gate = {"tp": 0, "fp": 0, "fn": 0}
+    per_intent = {}
+    stages = {"fast": 0, "llm": 0, "gate": 0}
+    local_latency, route_latency = [], []
+    mistakes, wrong_args = [], []
+
+    for item in corpus:
+        query, expected = item["query"], item.get("tool") or NO_TOOL
+
+        predicted, stage, call = route(query, llm, backend)
+        stages[stage] += 1
+
+        flagged = stage != "gate"
+        if flagged and expected != NO_TOOL:
+            gate["tp"] += 1
+        elif flagged:
+            gate["fp"] += 1
+        elif expected != NO_TOOL:
+            gate["fn"] += 1
+
+        for label in {expected, predicted}:
+            per_intent.setdefault(label, {"tp": 0, "fp": 0, "fn": 0})
+        if predicted == expected:
+            per_intent[expected]["tp"] += 1
+            if "args" in item and _CALL_ARGS.findall(call or "") != item["args"]:
+                wrong_args.append((query, item["args"], call, stage))
+        else:
+            per_intent[predicted]["fp"] += 1
+            per_intent[expected]["fn"] += 1
+            mistakes.append((query, expected, predicted, stage))
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if not fast_route(query):
+                detect_intent(query, backend)
+            local_latency.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            route(query, llm, backend)
+            route_latency.append(time.perf_counter() - start)
+
+    return {
+        "queries": len(corpus),
+        "gate": gate,
+        "per_intent": per_intent,
+        "stages": stages,
+        "local_latency": local_latency,
+        "route_latency": route_latency,
+        "mistakes": mistakes,
+        "wrong_args": wrong_args,
+    }
+
+
+def report(results):
+    gate_p, gate_r = precision_recall(**results["gate"])
+    stages = results["stages"]
+    print(f"Queries: {results['queries']}  "
+          f"(fast path: {stages['fast']}, decision LLM: {stages['llm']}, chatbot: {stages['gate']})")
+    print(f"detect_intent gate   precision {gate_p:6.1%}  recall {gate_r:6.1%}  "
+          f"false positives {results['gate']['fp']}")
+    print()
+    print(f"{'intent':<18}{'precision':>10}{'recall':>10}{'support':>9}")
+    for label, counts in sorted(results["per_intent"].items()):
+        precision, recall = precision_recall(**counts)
+        print(f"{label:<18}{precision:>10.1%}{recall:>10.1%}{counts['tp'] + counts['fn']:>9}")
+    print()
+    for name in ("local_latency", "route_latency"):
+        samples = results[name]
+        print(f"{name:<16} p50 {percentile(samples, 50) * 1e6:9.1f} µs   p99 {percentile(samples, 99) * 1e6:9.1f} µs")
+    if results["mistakes"]:
+        print("\nMisrouted queries:")
+        for query, expected, predicted, stage in results["mistakes"]:
+            print(f"  [{stage}] {query!r}: expected {expected}, got {predicted}")
+    if results["wrong_args"]:
+        print("\nRight tool, wrong arguments:")
+        for query, expected, call, stage in results["wrong_args"]:
+            print(f"  [{stage}] {query!r}: expected {expected}, got {call}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing accuracy/latency benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=50, help="latency samples per query")
+    parser.add_argument("--backend", choices=["keywords", "embedding"], default="keywords",
+                        help="detect_intent backend")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0, help="simulated decision LLM round trip")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.backend == "embedding":
+        from intentClassifier import EXAMPLES_FILE
+        corpus, overlap = held_out(corpus, EXAMPLES_FILE)
+        if overlap:
+            print(f"⚠️ Skipping {len(overlap)} corpus queries that are also training examples:")
+            for item in overlap:
+                print(f"  {item['query']!r}")
+    llm = ReplayLLM.from_corpus(corpus, delay=args.llm_delay_ms / 1000)
+    report(run_benchmark(corpus, llm, repeat=args.repeat, backend=args.backend))
+
+
+if __name__ == '__main__':
+    main()
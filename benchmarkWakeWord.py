@@ -0,0 +1,95 @@
+"""
+False-accept / false-reject benchmark for the wake-word spotter.
+
+Scores every WAV clip in a directory of wake-word recordings (positives) and one of other
+speech and room noise (negatives) against the enrolled templates, then reports:
+    - false-reject rate, false-accept rate and false accepts per hour at the threshold
+    - the same rates over a sweep of thresholds, and the equal-error threshold
+    - p50/p99 scoring time per clip
+
+    python benchmarkWakeWord.py --positives clips/alita --negatives clips/other
+    python benchmarkWakeWord.py --positives clips/alita --negatives clips/other --threshold 3.5
+
+Clips should be recorded with the microphone the assistant uses; templates and clips must not
+overlap, or the false-reject rate will look better than it is.
+"""
+import argparse
+import glob
+import os
+import time
+
+from benchmarkRouting import percentile
+from voiceCapture import SAMPLE_RATE, WavSource
+from wakeWord import TEMPLATE_DIR, THRESHOLD, WakeWordSpotter
+
+
+def score_clips(spotter, directory):
+    """ [(path, score, seconds of audio, scoring time)] for every WAV file in the directory. """
+    results = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        samples = WavSource(path).read()
+        started = time.perf_counter()
+        score = spotter.score(samples)
+        results.append((path, score, len(samples) / SAMPLE_RATE, time.perf_counter() - started))
+    return results
+
+
+def rates(positives, negatives, threshold, negative_hours):
+    false_rejects = sum(1 for _, score, _, _ in positives if score > threshold)
+    false_accepts = sum(1 for _, score, _, _ in negatives if score <= threshold)
+    return {
+        "frr": false_rejects / len(positives) if positives else 0.0,
+        "far": false_accepts / len(negatives) if negatives else 0.0,
+        "fa_per_hour": false_accepts / negative_hours if negative_hours else 0.0,
+    }
+
+
+def equal_error(positives, negatives, negative_hours):
+    """ The threshold (among observed scores) where the false-reject and false-accept rates are closest. """
+    def gap(threshold):
+        r = rates(positives, negatives, threshold, negative_hours)
+        return abs(r["frr"] - r["far"])
+
+    return min(sorted({score for _, score, _, _ in positives + negatives}), key=gap)
+
+
+def report(positives, negatives, threshold):
+    negative_hours = sum(seconds for _, _, seconds, _ in negatives) / 3600
+    current = rates(positives, negatives, threshold, negative_hours)
+    print(f"\nClips: {len(positives)} positive, {len(negatives)} negative ({negative_hours * 60:.1f} min)")
+    print(f"At threshold {threshold:.2f}: FRR {current['frr']:.1%}  FAR {current['far']:.1%}  "
+          f"false accepts/hour {current['fa_per_hour']:.1f}")
+
+    if positives and negatives:
+        print("\nthreshold     FRR     FAR   FA/hour")
+        eer = equal_error(positives, negatives, negative_hours)
+        for t in sorted({round(eer * f, 2) for f in (0.7, 0.8, 0.9, 1.0, 1.1, 1.2)}):
+            r = rates(positives, negatives, t, negative_hours)
+            print(f"{t:9.2f}  {r['frr']:6.1%}  {r['far']:6.1%}  {r['fa_per_hour']:8.1f}{'  <- EER' if t == round(eer, 2) else ''}")
+
+    timings = [elapsed * 1000 for _, _, _, elapsed in positives + negatives]
+    if timings:
+        print(f"\nScoring time per clip: p50 {percentile(timings, 50):.1f} ms  p99 {percentile(timings, 99):.1f} ms")
+
+    misses = [(path, score) for path, score, _, _ in positives if score > threshold]
+    misses += [(path, score) for path, score, _, _ in negatives if score <= threshold]
+    for path, score in misses[:20]:
+        print(f"  miss: {path} (score {score:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wake-word false-accept/false-reject benchmark")
+    parser.add_argument("--positives", required=True, help="directory of clips containing the wake word")
+    parser.add_argument("--negatives", required=True, help="directory of clips without it")
+    parser.add_argument("--templates", default=TEMPLATE_DIR)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    spotter = WakeWordSpotter(args.templates, threshold=args.threshold)
+    if not spotter.ready:
+        parser.error(f"No templates in {args.templates}; run 'python wakeWord.py enroll' first.")
+    report(score_clips(spotter, args.positives), score_clips(spotter, args.negatives), args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Bounded conversation memory for the chatbot and helper LLMs.
+
+Each request used to send a single stateless message, so follow-ups like "and tomorrow?" had
+nothing to refer to. ConversationMemory keeps the last MAX_TURNS exchanges in a ring buffer
+and folds turns that fall out of it into a rolling summary. messages() builds the prompt from
+the system prompt, the summary and as many recent turns as fit in the token budget, so the
+prompt stays the same size however long the session runs. Tokens are estimated from character
+counts (about four characters per token for English), which is close enough for budgeting.
+"""
+import threading
+from collections import deque
+
+TOKEN_BUDGET = 1024     # Prompt tokens for system prompt + summary + history + query
+MAX_TURNS = 8           # Exchanges kept verbatim
+SUMMARY_TOKENS = 200    # Size the rolling summary is kept under
+
+
+def estimate_tokens(text):
+    return max(1, round(len(text) / 4)) if text else 0
+
+
+def _truncate_tokens(text, tokens, keep="end"):
+    """ Cut text to about `tokens` tokens on a word boundary, keeping its start or its end. """
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    if keep == "end":
+        cut = text[-limit:]
+        return cut[cut.find(" ") + 1:] if " " in cut else cut
+    cut = text[:limit]
+    return cut[:cut.rfind(" ")] if " " in cut else cut
+
+
+def extractive_summary(summary, turns, tokens=SUMMARY_TOKENS):
+    """ Fallback summariser: append each turn in short form and keep the most recent part. """
+    lines = [summary] if summary else []
+    for user, assistant in turns:
+        lines.append(f"User asked: {_truncate_tokens(user, 30, keep='start')} "
+                     f"Assistant: {_truncate_tokens(assistant, 40, keep='start')}")
+    return _truncate_tokens(" ".join(lines), tokens)
+
+
+class ConversationMemory:
+    def __init__(self, system_prompt, budget=TOKEN_BUDGET, max_turns=MAX_TURNS,
+                 summary_tokens=SUMMARY_TOKENS, summarize=None):
+        """
+        summarize(summary, turns, tokens) -> new summary, e.g. an LLM call; it runs on a
+        background thread, and extractive_summary is used if it is missing or fails.
+        """
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.turns = deque(maxlen=max_turns)    # (user, assistant)
+        self.summary = ""
+        self.session = 0                        # Bumped by reset() so late summaries are discarded
+        self.last_prompt_tokens = 0
+        self.lock = threading.Lock()
+        self.fold_lock = threading.Lock()      # One summary update at a time
+
+    def add_turn(self, user, assistant):
+        with self.lock:
+            evicted = self.turns[0] if len(self.turns) == self.turns.maxlen else None
+            self.turns.append((user, assistant))
+            if evicted is None:
+                return
+            session = self.session
+        threading.Thread(target=self._fold, args=([evicted], session), daemon=True).start()
+
+    def _fold(self, turns, session):
+        with self.fold_lock:
+            with self.lock:
+                summary = self.summary
+            summary = self._summarize(summary, turns)
+            with self.lock:
+                if self.session == session:
+                    self.summary = summary
+
+    def _summarize(self, summary, turns):
+        new_summary = None
+        if self.summarize:
+            try:
+                new_summary = _truncate_tokens(self.summarize(summary, turns, self.summary_tokens), self.summary_tokens)
+            except Exception as e:
+                print(f"Conversation summary failed, using the short form: {e}")
+        return new_summary or extractive_summary(summary, turns, self.summary_tokens)
+
+    def messages(self, query):
+        """ Chat messages for the next request: system prompt (+ summary), recent turns, query. """
+        with self.lock:
+            turns, summary = list(self.turns), self.summary
+        system = self.system_prompt
+        if summary:
+            system += f"\n\nEarlier in this conversation: {summary}"
+        used = estimate_tokens(system) + estimate_tokens(query)
+
+        history = []
+        for user, assistant in reversed(turns):     # Newest first, until the budget runs out
+            cost = estimate_tokens(user) + estimate_tokens(assistant)
+            if used + cost > self.budget:
+                break
+            history[:0] = [{"role": "user", "content": user}, {"role": "assistant", "content": assistant}]
+            used += cost
+
+        self.last_prompt_tokens = used
+        return [{"role": "system", "content": system}] + history + [{"role": "user", "content": query}]
+
+    def recent(self, count=1):
+        """ The last `count` exchanges as chat messages, for calls that only need short context. """
+        with self.lock:
+            turns = list(self.turns)[-count:] if count else []
+        return [{"role": role, "content": text} for user, assistant in turns
+                for role, text in (("user", user), ("assistant", assistant))]
+
+    def reset(self):
+        """ Start a new session, e.g. when the assistant goes to sleep. """
+        with self.lock:
+            self.turns.clear()
+            self.summary = ""
+            self.session += 1
+
+    def stats(self):
+        with self.lock:
+            return {"turns": len(self.turns), "summary_tokens": estimate_tokens(self.summary),
+                    "prompt_tokens": self.last_prompt_tokens, "budget": self.budget}
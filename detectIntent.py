@@ -1,32 +1,201 @@
 import re
 
-def detect_intent(query):
-    query = query.lower().strip()
+# ✅ Define intent categories with diverse and expanded keywords
+TOOL_KEYWORDS = {
+    "communication": ["call", "message", "email", "text", "ping", "whatsapp", "send", "contact", "chat", "talk", "reach out", "write", "dial"],
+    "reminder": ["remind", "reminder", "schedule", "notify", "alert", "don't forget", "set reminder", "prompt", "tell me", "alert me", "notify me", "mark", "book"],
+    "alarm": ["alarm", "wake", "ring", "set alarm", "remind me to wake", "wake me up", "sound the alarm", "set an alarm", "reminder to wake"],
+    "weather": ["weather", "forecast", "temperature", "climate", "rain", "snow", "sunny", "weather report", "humidity", "wind", "forecast today", "how's the weather", "is it hot", "is it cold"],
+    "time": ["time", "clock", "current time", "what time", "now", "time check", "what's the time", "how late is it", "what's the hour", "tell me the time", "when is it"],
+    "search": ["search", "google", "lookup", "find", "browse", "explore", "look up", "search for", "look into", "check", "find out", "search online", "investigate"],
+    "open": ["open", "launch", "start", "access", "begin", "run", "execute", "open app", "open website", "start program", "show me", "bring up", "initiate", "load"],
+    "music": ["play", "song", "music", "playlist", "track", "tune", "radio", "listen", "hear", "put on", "start playing", "turn on music", "play a song", "play my playlist"],
+    "task": ["task", "do", "complete", "finish", "perform", "carry out", "take care of", "handle", "take on", "execute", "complete task", "make", "set", "increase", "decrease"],
+    "note": ["note", "write", "jot down", "take note", "make a note", "remember", "save this", "write down", "remind me", "note this"],
+    "question": ["question", "ask", "inquire", "wonder", "doubt", "query", "what", "how", "who", "why", "when", "tell me", "can you explain", "what is", "give me"],
+    "settings": ["settings", "preferences", "configuration", "set up", "adjust", "change", "customize", "modify", "personalize", "update", "set", "manage settings"],
+}
+
+
+def _build_keyword_index(tool_keywords):
+    """ Map every keyword to the intent categories it belongs to (a keyword may be shared). """
+    index = {}
+    for intent, keywords in tool_keywords.items():
+        for keyword in keywords:
+            categories = index.setdefault(keyword, [])
+            if intent not in categories:
+                categories.append(intent)
+    return index
+
+
+def _trie_pattern(words):
+    """
+    Build one alternation factored by common prefixes ("set(?: (?:alarm|an alarm|up))?") so the
+    regex engine walks a trie instead of retrying every keyword at each position. Optional tails
+    are greedy, so the longest keyword starting at a position wins; _build_prefix_index recovers
+    the shorter ones.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return render(trie)
 
-    # ✅ Define intent categories with diverse and expanded keywords
-    tool_keywords = {
-        "communication": ["call", "message", "email", "text", "ping", "whatsapp", "send", "contact", "chat", "talk", "reach out", "write", "dial"],
-        "reminder": ["remind", "reminder", "schedule", "notify", "alert", "don't forget", "set reminder", "prompt", "tell me", "alert me", "notify me", "mark", "book"],
-        "alarm": ["alarm", "wake", "ring", "set alarm", "remind me to wake", "wake me up", "sound the alarm", "set an alarm", "reminder to wake"],
-        "weather": ["weather", "forecast", "temperature", "climate", "rain", "snow", "sunny", "weather report", "humidity", "wind", "forecast today", "how's the weather", "is it hot", "is it cold"],
-        "time": ["time", "clock", "current time", "what time", "now", "time check", "what's the time", "how late is it", "what's the hour", "tell me the time", "when is it"],
-        "search": ["search", "google", "lookup", "find", "browse", "explore", "look up", "search for", "look into", "check", "find out", "search online", "investigate"],
-        "open": ["open", "launch", "start", "access", "begin", "run", "execute", "open app", "open website", "start program", "show me", "bring up", "initiate", "load"],
-        "music": ["play", "song", "music", "playlist", "track", "tune", "radio", "listen", "hear", "put on", "start playing", "turn on music", "play a song", "play my playlist"],
-        "task": ["task", "do", "complete", "finish", "perform", "carry out", "take care of", "handle", "take on", "execute", "complete task", "make", "set", "increase", "decrease"],
-        "note": ["note", "write", "jot down", "take note", "make a note", "remember", "save this", "write down", "remind me", "note this"],
-        "question": ["question", "ask", "inquire", "wonder", "doubt", "query", "what", "how", "who", "why", "when", "tell me", "can you explain", "what is", "give me"],
-        "settings": ["settings", "preferences", "configuration", "set up", "adjust", "change", "customize", "modify", "personalize", "update", "set", "manage settings"],
+
+def _build_prefix_index(keywords):
+    """
+    Map every keyword to the shorter keywords that also match wherever it matches: its prefixes
+    that end on a word boundary inside it ("remind me to wake" -> "remind me", "remind").
+    """
+    is_word = lambda char: char.isalnum() or char == "_"
+    return {
+        keyword: [short for short in keywords
+                  if len(short) < len(keyword) and keyword.startswith(short)
+                  and is_word(short[-1]) != is_word(keyword[len(short)])]
+        for keyword in keywords
     }
 
+
+# ✅ Built once at import time. The lookahead keeps every match zero-width, so keywords that
+# overlap ("set an alarm" / "alarm") are all reported from a single scan of the query.
+_KEYWORD_INDEX = _build_keyword_index(TOOL_KEYWORDS)
+_PREFIX_INDEX = _build_prefix_index(_KEYWORD_INDEX)
+_KEYWORD_PATTERN = re.compile(r"\b(?=(" + _trie_pattern(_KEYWORD_INDEX) + r")\b)")
+_NEGATION_PATTERN = re.compile(r"\b(don't|do not|cancel|stop|never)\b")
+
+
+def match_intents(query):
+    """
+    Scan the query once and return every matched intent category with its match positions:
+    {"alarm": [(start, end, "set an alarm")], ...}. Positions index into the lower-cased,
+    stripped query. Returns an empty dict for negated queries.
+    """
+    query = query.lower().strip()
+
     # ✅ Negation check (Prevent false positives for negative queries)
-    if re.search(r"\b(don't|do not|cancel|stop|never)\b", query):
-        return False
+    if _NEGATION_PATTERN.search(query):
+        return {}
 
-    # ✅ Pattern matching for diverse intent recognition with flexibility
-    for intent, keywords in tool_keywords.items():
-        for keyword in keywords:
-            if re.search(rf"\b{re.escape(keyword)}\b", query):
-                return True
+    matches = {}
+    for match in _KEYWORD_PATTERN.finditer(query):
+        start = match.start(1)
+        for keyword in [match.group(1)] + _PREFIX_INDEX[match.group(1)]:
+            for intent in _KEYWORD_INDEX[keyword]:
+                matches.setdefault(intent, []).append((start, start + len(keyword), keyword))
+    return matches
+
+
+def intent_labels(query, backend="keywords"):
+    """
+    What made the query look like a tool query: the matched TOOL_KEYWORDS categories, or with
+    backend="embedding" the tool predicted by intentClassifier (requires numpy). Empty if none.
+    """
+    if backend == "embedding":
+        from intentClassifier import classify_intent, NO_TOOL
+        label = classify_intent(query)[0]
+        return [] if label == NO_TOOL else [label]
+    return list(match_intents(query))
+
+
+def detect_intent(query, backend="keywords"):
+    """ True if the query looks like it needs a tool (see intent_labels for the backends). """
+    return bool(intent_labels(query, backend))
+
+
+# ------------------------------------------------------------------------------
+# Rule-based fast path: exact function_map calls for deterministic commands
+# ------------------------------------------------------------------------------
+
+# Keep in sync with the apps dict in tools.open_system_app
+SYSTEM_APPS = ["terminal", "task manager", "notepad", "explorer", "control panel", "settings",
+               "calculator", "wifi", "bluetooth", "diskmgmt", "camera"]
+
+_FILLER_PATTERN = re.compile(
+    r"^(?:(?:hey |ok |okay )?alita\b[ ,]*)?(?:(?:please|can you|could you|would you|will you|kindly)\s+)*"
+)
+_TIME_SLOT = r"(\d{1,2}(?:[:.]\d{2})?(?: ?[ap]\.?m\.?)?)(?: (tomorrow|today|tonight))?"
+_WHEN_SLOT = (r"(?:today|tonight|tomorrow|(?:this )?weekend|monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+              r"(?: (?:morning|afternoon|evening|night))?|this (?:morning|afternoon|evening)")
+_LEVEL_WORDS = {"full": "100%", "max": "100%", "maximum": "100%", "half": "50%", "zero": "0%", "minimum": "0%"}
+_DIRECTIONS = {"up": "increase", "increase": "increase", "raise": "increase",
+               "down": "decrease", "decrease": "decrease", "lower": "decrease", "reduce": "decrease"}
+
+
+def _call(name, *args):
+    """ Render a call string exactly as the router LLM would, e.g. control_system("volume", "80%"). """
+    return f"{name}(" + ", ".join(f'"{arg}"' for arg in args) + ")"
+
+
+def _level(value):
+    if value in _LEVEL_WORDS:
+        return _LEVEL_WORDS[value]
+    percent = int(value)
+    return f"{percent}%" if 0 <= percent <= 100 else None
+
+
+def _alarm_time(match):
+    slot = re.sub(r"\.(?=\d)", ":", match.group(1)).replace(".", "").upper()
+    slot = re.sub(r"(\d)([AP]M)", r"\1 \2", slot)
+    if slot.isdigit():
+        slot += ":00"     # dateparser reads a lone "7" as a day of the month
+    return _call("set_alarm", f"{slot} {match.group(2)}" if match.group(2) else slot)
+
+
+_FAST_RULES = [
+    (re.compile(r"(?:what(?:'s| is) the (?:current )?time(?: now| right now)?|what time is it(?: now| right now)?"
+                r"|(?:tell me|say) the (?:current )?time|(?:the )?current time|time now|what's the hour)"),
+     lambda m: _call("get_time")),
+    (re.compile(r"(?:what(?:'s| is) the weather(?: like)?|how(?:'s| is) the weather|(?:tell me|give me) the weather"
+                r"|weather(?: report| update)?)(?: today| now| right now| outside)?"),
+     lambda m: _call("get_weather")),
+    (re.compile(r"(?:will it|is it going to|is it gonna) (?:rain|snow|be (?:hot|cold|sunny|cloudy|windy))"
+                r"(?: on| in the)? (" + _WHEN_SLOT + ")"
+                r"|(?:what(?:'s| is) )?(?:the )?(?:weather |forecast |weather forecast )(?:for |on )?(?:the )?(" + _WHEN_SLOT + ")"
+                r"|(?:the )?(" + _WHEN_SLOT + ") (?:weather|forecast|weather forecast)"),
+     lambda m: _call("get_forecast", m.group(1) or m.group(2) or m.group(3))),
+    (re.compile(r"(?:(?:run|do|perform|start) (?:a |the )?)?(?:system (?:check|diagnostics?|status)|diagnostics?)"
+                r"|check (?:the |my )?system"),
+     lambda m: _call("system_check")),
+    (re.compile(r"(?:turn |crank |bring )?(?:the )?(volume|brightness) (up|down)|(?:turn )?(up|down) the (volume|brightness)"),
+     lambda m: _call("control_system", m.group(1) or m.group(4), _DIRECTIONS[m.group(2) or m.group(3)])),
+    (re.compile(r"(increase|raise|decrease|lower|reduce) (?:the )?(volume|brightness)"),
+     lambda m: _call("control_system", m.group(2), _DIRECTIONS[m.group(1)])),
+    (re.compile(r"(?:set|change|put|turn|increase|raise|decrease|lower|reduce|make) (?:the )?(volume|brightness)"
+                r"(?: to| at)? (\d{1,3}|full|max|maximum|half|zero|minimum)(?: ?%| percent)?"),
+     lambda m: _level(m.group(2)) and _call("control_system", m.group(1), _level(m.group(2)))),
+    (re.compile(r"mute(?: the)?(?: volume| sound| audio)?"),
+     lambda m: _call("control_system", "volume", "0%")),
+    (re.compile(r"(?:open|launch|start|bring up) (?:the |my )?(" + "|".join(map(re.escape, SYSTEM_APPS)) + r")(?: app)?"),
+     lambda m: _call("open_system_app", m.group(1))),
+    (re.compile(r"(?:set (?:an |the |my )?alarm|wake me(?: up)?|alarm) (?:for |at )" + _TIME_SLOT),
+     _alarm_time),
+]
+
+
+def fast_route(query):
+    """
+    Return the exact function_map call string for high-confidence deterministic commands
+    ("turn the volume up" -> control_system("volume", "increase")), or None to abstain and
+    let the router LLM decide.
+    """
+    query = query.lower().strip()
+    if _NEGATION_PATTERN.search(query):
+        return None
 
-    return False
\ No newline at end of file
+    query = _FILLER_PATTERN.sub("", query)
+    query = re.sub(r"[?!.,]+$", "", query).strip()
+    for pattern, build in _FAST_RULES:
+        match = pattern.fullmatch(query)
+        if match:
+            return build(match) or None
+    return None
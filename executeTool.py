@@ -1,44 +1,163 @@
-import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 # --------------------
 # Importing Tools
 # --------------------
 from tools import (send_message,
                    whatsapp_call,
                    control_system,
+                   start_control_system,
                    get_time,
                    get_weather,
+                   get_forecast,
                    system_check,
                    play_music,
                    open_system_app,
                    set_alarm,
                    set_reminder,
-                   search_web)
+                   search_web,
+                   get_message_status)
+from parseToolCall import ToolCallParser, ToolCallError
+from toolRegistry import ToolRegistry
 
 
-def extract_function_name(call_str):
-    """ Extract the function name from a call like set_reminder("msg", "time") """
-    match = re.match(r"([a-zA-Z_][a-zA-Z0-9_]*)\(", call_str)
-    return match.group(1) if match else None
+# Seconds a single call may take before its result is reported as timed out
+DEFAULT_TOOL_TIMEOUT = 10
+TOOL_TIMEOUTS = {
+    "get_time": 1,
+    "system_check": 5,
+    "control_system": 5,
+    "open_system_app": 5,
+    "set_alarm": 5,
+    "set_reminder": 5,
+    "get_weather": 8,
+    "get_forecast": 8,
+    "search_web": 10,
+    "play_music": 15,
+    "send_message": 2,
+    "get_message_status": 1,
+    "whatsapp_call": 2,
+}
+MAX_TOOL_WORKERS = 4
 
+# Tools with a non-blocking variant that returns a Future. They are started on the submitting
+# thread in submission order instead of on tool_pool, so a reply's calls reach the tool together
+# (SystemController writes a burst of control_system commands once).
+QUEUED_TOOLS = {
+    "control_system": start_control_system,
+}
 
-def execute_function_call(call_str):
+# Bounded pool shared by all queries; a tool that hangs past its timeout keeps its worker
+# until it returns, but no longer blocks the generation thread.
+tool_pool = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS, thread_name_prefix="tool")
+
+
+def _run_call(call):
+    if isinstance(call, ToolCallError):
+        return {"tool": None, "call": call.source, "error": call.error}
+
+    print(f"Executing: {call.source}")
     try:
-        text = re.sub(r'^\s+|\s+$', '', call_str)
-        func_name = extract_function_name(text)
+        result = function_map[call.name](*call.args, **call.kwargs)
+        return {"tool": call.name, "call": call.source, "result": result}
+    except Exception as e:
+        return {"tool": call.name, "call": call.source, "error": f"An unexpected error occurred: {e}"}
 
-        if func_name not in function_map:
-            print(f"Error: Function '{func_name}' is not defined.")
-            return
 
-        print(f"Executing: {call_str}")
-        result = eval(call_str, {"__builtins__": {}}, function_map)
-        return result
+def _start_queued(call):
+    """ Start a QUEUED_TOOLS call; returns a Future of its result entry. """
+    print(f"Executing: {call.source}")
+    entry = Future()
+
+    def finish(future):
+        if not entry.cancelled():
+            entry.set_result({"tool": call.name, "call": call.source, "result": future.result()})
+
+    try:
+        QUEUED_TOOLS[call.name](*call.args, **call.kwargs).add_done_callback(finish)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        entry.set_result({"tool": call.name, "call": call.source, "error": f"An unexpected error occurred: {e}"})
+    return entry
+
+
+class ToolDispatch:
+    """
+    Starts tool calls as soon as they are submitted, so calls streamed by the router run while
+    it is still generating. Calls to different tools run concurrently on tool_pool; calls to
+    the same tool run one after another in submission order, each within its TOOL_TIMEOUTS
+    budget. QUEUED_TOOLS calls are handed to their tool's own queue instead. results() returns one entry per call, in submission order:
+    {"tool", "call", "result"} on success or {"tool", "call", "error"} on failure.
+    """
+    def __init__(self):
+        self.entries = []       # (call, future, deadline); future is a finished result for parse errors
+        self.last = {}          # tool name -> (future, deadline) of its latest call
+        self.cancelled = {}     # tool name -> Event set once one of its calls timed out
+
+    def __len__(self):
+        return len(self.entries)
+
+    def submit(self, call_str):
+        """ Parse decision LLM output and start every call in it. """
+        for call in parser.parse(call_str):
+            self.add(call)
+
+    def add(self, call):
+        if isinstance(call, ToolCallError):
+            self.entries.append((call, _run_call(call), None))
+            return
+        if call.name in QUEUED_TOOLS:
+            deadline = time.monotonic() + TOOL_TIMEOUTS.get(call.name, DEFAULT_TOOL_TIMEOUT)
+            self.entries.append((call, _start_queued(call), deadline))
+            return
+        previous, previous_deadline = self.last.get(call.name, (None, time.monotonic()))
+        deadline = max(previous_deadline, time.monotonic()) + TOOL_TIMEOUTS.get(call.name, DEFAULT_TOOL_TIMEOUT)
+        cancelled = self.cancelled.setdefault(call.name, threading.Event())
+        future = tool_pool.submit(self._run_after, previous, cancelled, call, deadline)
+        self.last[call.name] = (future, deadline)
+        self.entries.append((call, future, deadline))
+
+    @staticmethod
+    def _run_after(previous, cancelled, call, deadline):
+        if previous is not None:
+            # Don't hold a worker forever behind a call that hangs
+            wait([previous], timeout=max(0.0, deadline - time.monotonic()))
+            if not previous.done():
+                return None
+        if cancelled.is_set():
+            return None
+        return _run_call(call)
+
+    def results(self):
+        results = []
+        for call, future, deadline in self.entries:
+            if deadline is None:
+                results.append(future)
+                continue
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                # Timed out: skip later calls to this tool that have not started yet
+                self.cancelled.setdefault(call.name, threading.Event()).set()
+                future.cancel()
+                result = None
+            if result is None:
+                timeout = TOOL_TIMEOUTS.get(call.name, DEFAULT_TOOL_TIMEOUT)
+                result = {"tool": call.name, "call": call.source, "error": f"Timed out after {timeout}s"}
+            results.append(result)
+        return results
+
+
+def execute_function_call(call_str):
+    """ Run every tool call found in the decision LLM output; see ToolDispatch for the semantics. """
+    dispatch = ToolDispatch()
+    dispatch.submit(call_str)
+    return dispatch.results()
 
 
 function_map = {
     "get_weather": get_weather,
+    "get_forecast": get_forecast,
     "get_time": get_time,
     "open_system_app": open_system_app,
     "send_message": send_message,
@@ -48,5 +167,9 @@ function_map = {
     "system_check": system_check,
     "set_alarm": set_alarm,
     "whatsapp_call": whatsapp_call,
-    "control_system": control_system
-}
\ No newline at end of file
+    "control_system": control_system,
+    "get_message_status": get_message_status
+}
+
+parser = ToolCallParser(function_map)
+registry = ToolRegistry(function_map)
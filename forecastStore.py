@@ -0,0 +1,117 @@
+"""
+OpenWeatherMap forecast store.
+
+The /forecast endpoint returns 40 three-hour slots (5 days). ForecastStore downloads them once
+per city over a pooled HTTP session and keeps them as column arrays sorted by timestamp, so
+"now", "tomorrow evening" or "the weekend" are answered by binary search without another
+request. Point base_url at a local stub server, or seed a city with load() from recorded JSON,
+to use it offline.
+"""
+import bisect
+import threading
+import time
+from array import array
+from datetime import datetime
+
+import requests
+
+FORECAST_URL = "http://api.openweathermap.org/data/2.5/forecast"
+FORECAST_TTL = 1800     # Seconds before a city's forecast is downloaded again
+
+
+class CityForecast:
+    """ Parsed forecast series for one city: parallel arrays indexed by slot. """
+    def __init__(self, city, payload):
+        self.city = city
+        self.fetched_at = time.monotonic()
+        slots = sorted(payload.get("list", []), key=lambda s: s["dt"])
+
+        self.times = array("q", (s["dt"] for s in slots))
+        self.temp_c = array("f", (round(s["main"]["temp"] - 273.15, 2) for s in slots))
+        self.humidity = array("B", (s["main"]["humidity"] for s in slots))
+        self.wind_kmph = array("f", (round(s["wind"]["speed"] * 3.6, 2) for s in slots))
+        self.clouds = array("B", (s["clouds"]["all"] for s in slots))
+        self.pop = array("f", (s.get("pop", 0) for s in slots))
+        self.rain_mm = array("f", (s.get("rain", {}).get("3h", 0) for s in slots))
+        self.conditions = [s["weather"][0]["description"] if s.get("weather") else "" for s in slots]
+
+    def __len__(self):
+        return len(self.times)
+
+    def slot(self, i):
+        return {
+            "time": datetime.fromtimestamp(self.times[i]).strftime("%a %d %b %I:%M %p"),
+            "temperature_celsius": round(self.temp_c[i], 2),
+            "humidity_percent": self.humidity[i],
+            "wind_speed_kmph": round(self.wind_kmph[i], 2),
+            "cloudiness_percent": self.clouds[i],
+            "chance_of_rain_percent": round(self.pop[i] * 100, 2),
+            "rain_mm": round(self.rain_mm[i], 2),
+            "conditions": self.conditions[i],
+        }
+
+    def index_at(self, when):
+        """ Index of the slot covering `when` (the last slot starting at or before it). """
+        i = bisect.bisect_right(self.times, int(when.timestamp())) - 1
+        return min(max(i, 0), len(self.times) - 1)
+
+    def at(self, when):
+        return self.slot(self.index_at(when))
+
+    def between(self, start, end):
+        """ Slots overlapping [start, end). Each slot covers three hours from its timestamp. """
+        lo = bisect.bisect_right(self.times, int(start.timestamp()) - 3 * 3600)
+        hi = bisect.bisect_left(self.times, int(end.timestamp()))
+        return range(lo, hi)
+
+    def summary(self, start, end):
+        """ Aggregate the slots between start and end, or None if the range is not covered. """
+        slots = self.between(start, end)
+        if not slots:
+            return None
+        pop = max(self.pop[i] for i in slots)
+        rain = sum(self.rain_mm[i] for i in slots)
+        conditions = []
+        for i in slots:
+            if self.conditions[i] and self.conditions[i] not in conditions:
+                conditions.append(self.conditions[i])
+        return {
+            "from": datetime.fromtimestamp(self.times[slots[0]]).strftime("%a %d %b %I:%M %p"),
+            "to": datetime.fromtimestamp(self.times[slots[-1]] + 3 * 3600).strftime("%a %d %b %I:%M %p"),
+            "min_temperature_celsius": round(min(self.temp_c[i] for i in slots), 2),
+            "max_temperature_celsius": round(max(self.temp_c[i] for i in slots), 2),
+            "max_chance_of_rain_percent": round(pop * 100, 2),
+            "total_rain_mm": round(rain, 2),
+            "will_it_rain": pop >= 0.5 or rain > 0.5,
+            "conditions": conditions,
+        }
+
+
+class ForecastStore:
+    """ Per-city CityForecast cache refreshed every `ttl` seconds over one requests.Session. """
+    def __init__(self, api_key, base_url=FORECAST_URL, ttl=FORECAST_TTL, session=None, timeout=5):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.cities = {}
+        self.lock = threading.Lock()
+
+    def load(self, city, payload):
+        """ Seed a city from an already-parsed /forecast response (e.g. a recorded JSON fixture). """
+        forecast = CityForecast(city, payload)
+        with self.lock:
+            self.cities[city.lower()] = forecast
+        return forecast
+
+    def get(self, city):
+        """ Return the city's forecast, downloading it if missing or older than ttl. Raises on HTTP errors. """
+        with self.lock:
+            forecast = self.cities.get(city.lower())
+        if forecast is not None and time.monotonic() - forecast.fetched_at < self.ttl:
+            return forecast
+
+        response = self.session.get(self.base_url, params={"q": city, "appid": self.api_key}, timeout=self.timeout)
+        response.raise_for_status()
+        return self.load(city, response.json())
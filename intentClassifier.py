@@ -0,0 +1,120 @@
+"""
+Embedding-based intent classifier: an alternative backend for detectIntent.detect_intent.
+
+Queries are embedded with a hashed word/char n-gram featurizer and scored against a matrix of
+example utterances (data/intent_examples.json) with a single matrix-vector product. The example
+matrix is precomputed once and memory-mapped from data/intent_prototypes.npy on later starts.
+"""
+import hashlib
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+EXAMPLES_FILE = "data/intent_examples.json"
+PROTOTYPES_FILE = "data/intent_prototypes.npy"
+PROTOTYPES_META_FILE = "data/intent_prototypes.json"
+
+N_FEATURES = 2 ** 12
+MIN_CONFIDENCE = 0.35   # Below this cosine similarity the query is treated as "none"
+NO_TOOL = "none"
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _features(text):
+    """ Word unigrams, word bigrams and char 3-grams of each padded word. """
+    words = _WORD_PATTERN.findall(text.lower())
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+
+def embed(text):
+    """ L2-normalised float32 vector of signed feature hashes (crc32 is stable across runs). """
+    vector = np.zeros(N_FEATURES, dtype=np.float32)
+    for feature in _features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % N_FEATURES] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _examples_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def build_prototypes(examples_file=EXAMPLES_FILE, prototypes_file=PROTOTYPES_FILE, meta_file=PROTOTYPES_META_FILE):
+    """
+    Embed every example utterance and save the matrix (rows grouped by label) to prototypes_file.
+    The sidecar meta_file records the label of each row group and a digest of the examples.
+    """
+    with open(examples_file, encoding="utf-8") as f:
+        examples = json.load(f)
+
+    labels, starts, rows = [], [], []
+    for label, utterances in examples.items():
+        labels.append(label)
+        starts.append(len(rows))
+        rows.extend(embed(u) for u in utterances)
+
+    np.save(prototypes_file, np.vstack(rows).astype(np.float32))
+    with open(meta_file, "w", encoding="utf-8") as f:
+        json.dump({"digest": _examples_digest(examples_file), "n_features": N_FEATURES,
+                   "labels": labels, "starts": starts}, f)
+
+
+class IntentClassifier:
+    """
+    Nearest-example classifier over the prototype matrix. classify() returns (label, confidence)
+    where confidence is the cosine similarity of the closest example of that label.
+    """
+    def __init__(self, examples_file=EXAMPLES_FILE, prototypes_file=PROTOTYPES_FILE,
+                 meta_file=PROTOTYPES_META_FILE, min_confidence=MIN_CONFIDENCE):
+        if self._is_stale(examples_file, meta_file):
+            build_prototypes(examples_file, prototypes_file, meta_file)
+
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.labels = meta["labels"]
+        self.starts = np.asarray(meta["starts"], dtype=np.intp)
+        self.prototypes = np.load(prototypes_file, mmap_mode="r")
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def _is_stale(examples_file, meta_file):
+        if not os.path.exists(meta_file):
+            return True
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta.get("digest") != _examples_digest(examples_file) or meta.get("n_features") != N_FEATURES
+
+    def scores(self, query):
+        """ Best similarity per label, in self.labels order. """
+        similarities = self.prototypes @ embed(query)
+        return np.maximum.reduceat(similarities, self.starts)
+
+    def classify(self, query):
+        scores = self.scores(query)
+        best = int(np.argmax(scores))
+        confidence = float(scores[best])
+        if confidence < self.min_confidence:
+            return NO_TOOL, confidence
+        return self.labels[best], confidence
+
+
+_classifier = None
+
+
+def classify_intent(query):
+    """ Classify with a shared, lazily loaded IntentClassifier. """
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifier()
+    return _classifier.classify(query)
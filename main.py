@@ -1,15 +1,14 @@
 import time
 import threading
-import re
 import queue
-import pyaudio
+from collections import deque
 import numpy as np
-import speech_recognition as sr
 from kokoro import KPipeline
 import ollama
 import datetime
 from groq import Groq
 import os
+import json
 from dotenv import load_dotenv
 import keyboard
 
@@ -19,8 +18,17 @@ load_dotenv()
 # --------------------
 # Other files
 # --------------------
-from detectIntent import detect_intent as di
-from executeTool import execute_function_call as ex
+from detectIntent import detect_intent as di, fast_route, intent_labels
+from executeTool import ToolDispatch, parser, registry
+from tools import scheduler
+from sentenceSegmenter import SentenceSegmenter
+from audioOutput import AudioOutput
+from ttsCache import AudioCache
+from voiceCapture import ASRError, Endpointer, EnergyVAD, MicrophoneSource, create_asr
+from wakeWord import WakeWordSpotter
+from speculativeRouter import SpeculationStats, SpeculativeStream
+from responseTemplates import FIXED_SENTENCES, render_response
+from conversationMemory import ConversationMemory
 
 # ---------------------------
 # Decision LLM initialization
@@ -29,6 +37,13 @@ client = Groq(
     api_key=os.getenv("API_KEY"),
 )
 
+# "keywords" (default) or "embedding" to route with the example-based intent classifier
+INTENT_BACKEND = os.getenv("INTENT_BACKEND", "keywords")
+
+# Start the chatbot stream while the router decides whether a flagged query needs a tool
+SPECULATIVE_ROUTING = os.getenv("SPECULATIVE_ROUTING", "1") == "1"
+speculation_stats = SpeculationStats()
+
 
 def get_greeting():
     hour = datetime.datetime.now().hour
@@ -44,15 +59,39 @@ def get_greeting():
 # ------------------------------------------------------------------------------
 
 
-cancel_event = threading.Event()
-query_queue = queue.Queue()          # Queue for incoming queries
-sentence_queue = queue.Queue()       # Queue for complete sentences from LLM
+class Generation:
+    """
+    Every query (and every "stop") starts a new generation. Work is tagged with the generation
+    it belongs to, and each stage (LLM stream, sentence queue, TTS, audio output) drops anything
+    whose generation is no longer current, so nothing has to be drained or slept on.
+    """
+    def __init__(self):
+        self.current = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            self.current += 1
+            return self.current
+
+    def is_current(self, gen):
+        return gen == self.current
+
+
+generation = Generation()
+query_queue = queue.Queue()          # (generation, query) for incoming queries
+sentence_queue = queue.Queue()       # (generation, sentence) for complete sentences from LLM
 
 WAKE_WORD = "alita"
 USER = "Lord"
 is_sleeping = True
 sleep_timer = None
 
+# Rendered into the TTS cache while idle at startup; add more with TTS_WARMUP_PHRASES="a|b|c"
+WARMUP_PHRASES = [f"{greeting}, {USER}" for greeting in ("Good Morning", "Good Afternoon", "Good Evening")]
+WARMUP_PHRASES += FIXED_SENTENCES
+WARMUP_PHRASES += [p.strip() for p in os.getenv("TTS_WARMUP_PHRASES", "").split("|") if p.strip()]
+
 
 def start_sleep_timer():
     global sleep_timer
@@ -67,18 +106,32 @@ def go_to_sleep():
     global is_sleeping
     print("😴 LLM is now asleep due to inactivity.")
     is_sleeping = True
+    memory.reset()     # A new conversation starts at the next wake word
+
+
+def summarize_turns(summary, turns, tokens):
+    """ Folds exchanges that fell out of memory into the rolling summary using the helper LLM. """
+    transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+    response = ollama.chat(
+        model="helper",
+        messages=[{'role': 'user', 'content': (
+            f"Summary so far: {summary or 'none'}\n{transcript}\n"
+            f"Update the summary with the facts above in under {tokens * 3 // 4} words. Reply with the summary only."
+        )}],
+        options={'num_gpu_layers': 50},
+        stream=False
+    )
+    return response['message']['content'].strip()
 
 
-# Conversation history for LLM interaction
-messages = [{
-    "role": "system",
-    "content": (
-        "You are a highly intelligent assistant. "
-        "You always answer what is asked. "
-        "Always answer in the shortest possible manner yet engaging."
-        "You add punctuations like (.!?) in your response frequently."
-    )
-}]
+# Conversation history for LLM interaction: recent turns plus a rolling summary, within a token budget
+memory = ConversationMemory(
+    "You are a highly intelligent assistant. "
+    "You always answer what is asked. "
+    "Always answer in the shortest possible manner yet engaging."
+    "You add punctuations like (.!?) in your response frequently.",
+    summarize=summarize_turns
+)
 
 # ------------------------------------------------------------------------------
 # InstantTTS Class Definition
@@ -87,430 +140,443 @@ messages = [{
 
 class InstantTTS:
     """
-    Synchronous TTS using KPipeline. Handles audio stream setup and synchronous speech.
+    Pipelined TTS using KPipeline. A synthesis thread turns sentences from sentence_queue into
+    audio up to `lookahead` sentences ahead of what is playing, and a playback thread writes
+    the audio into the AudioOutput ring buffer, so the next sentence is ready when the current
+    one ends. Sentences and audio of a stale generation are dropped at every step, and stop()
+    silences whatever is still queued for the device. Short phrases are kept
+    in an AudioCache and played from disk the next time they are spoken.
     """
-    def __init__(self, voice="af_heart"):
+    SENTENCE_START = "start"
+    AUDIO = "audio"
+    SENTENCE_END = "end"
+
+    def __init__(self, generation, voice="af_heart", speed=1.2, lookahead=2, lang='a'):
+        self.generation = generation
         self.voice = voice
-        self.pipeline = KPipeline(lang_code='a')
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(
-            format=pyaudio.paFloat32,
-            channels=1,
-            rate=24000,
-            output=True,
-            frames_per_buffer=16  # Reduced frame size for lower latency
-        )
-
-    def speak_sync(self, text, speed=1.2):
-        """Synchronously generate and play TTS audio for a sentence."""
-        try:
-            for _, _, audio in self.pipeline(text, voice=self.voice, speed=speed):
-                if cancel_event.is_set():
-                    break
-                if audio is not None:
-                    audio_chunk = audio.cpu().numpy().squeeze().astype(np.float32)
-                    if not self.stream.is_active():
-                        try:
-                            self.stream.start_stream()
-                        except Exception:
-                            continue
-                    self.stream.write(audio_chunk.tobytes())
-        except Exception as e:
-            print(f"TTS error: {e}")
+        self.speed = speed
+        self.lang = lang
+        self.pipeline = KPipeline(lang_code=lang)
+        self.output = AudioOutput(rate=24000)
+        self.cache = AudioCache()
+        self.warmup = deque()                               # Phrases to pre-render when idle
+        self.audio_queue = queue.Queue()                    # (kind, generation, time or audio chunk)
+        self.lookahead = threading.Semaphore(lookahead)     # Sentences synthesized but not yet played
+        self.gaps = deque(maxlen=500)                       # Silence between back-to-back sentences (s)
+
+    def synthesize(self, text, speed=None):
+        """Yield float32 audio chunks for a sentence, straight from the cache when possible."""
+        speed = speed or self.speed
+        cacheable = self.cache.cacheable(text)
+        if cacheable:
+            cached = self.cache.get(text, self.voice, speed, self.lang)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        for _, _, audio in self.pipeline(text, voice=self.voice, speed=speed):
+            if audio is not None:
+                chunk = AudioOutput.as_samples(audio)
+                if cacheable:
+                    chunks.append(chunk)
+                yield chunk
+        # Only reached when the consumer took every chunk, so cancelled phrases are never stored
+        if chunks:
+            self.cache.put(text, self.voice, speed, self.lang, np.concatenate(chunks))
+
+    def warm_up(self, phrases):
+        """Queue phrases to be rendered into the cache whenever there is nothing to say."""
+        self.warmup.extend(phrases)
+
+    def render_warmup(self):
+        phrase = self.warmup.popleft()
+        if self.cache.cacheable(phrase) and not self.cache.has(phrase, self.voice, self.speed, self.lang):
+            try:
+                for _ in self.synthesize(phrase):
+                    pass
+            except Exception as e:
+                print(f"TTS warm-up error: {e}")
+
+    def play(self, audio_chunk, gen):
+        self.output.write(audio_chunk, is_current=lambda: self.generation.is_current(gen))
+
+    def stop(self):
+        """Drop all audio queued for the device; call after starting a new generation."""
+        self.output.flush()
+
+    def synthesis_worker(self, sentences):
+        """Pulls sentences and synthesizes ahead of playback, at most `lookahead` sentences."""
+        while True:
+            try:
+                gen, sentence = sentences.get(block=not self.warmup)
+            except queue.Empty:
+                self.render_warmup()
+                continue
+            self.lookahead.acquire()
+            if not self.generation.is_current(gen):
+                self.lookahead.release()
+                continue
+            print(f"\nProcessing: {sentence}")
+            self.audio_queue.put((self.SENTENCE_START, gen, time.perf_counter()))
+            try:
+                for audio_chunk in self.synthesize(sentence):
+                    if not self.generation.is_current(gen):
+                        break
+                    self.audio_queue.put((self.AUDIO, gen, audio_chunk))
+            except Exception as e:
+                print(f"TTS error: {e}")
+            self.audio_queue.put((self.SENTENCE_END, gen, time.perf_counter()))
+
+    def playback_worker(self):
+        """Streams synthesized chunks to the output device as soon as they are ready."""
+        last_end = None     # When the previous sentence finished playing
+        gap_start = None    # Set while the next sentence was ready in time but has no audio yet
+        while True:
+            kind, gen, item = self.audio_queue.get()
+            if kind == self.SENTENCE_START:
+                # Only count silence the pipeline caused: the text arrived before playback ran dry
+                gap_start = last_end if last_end is not None and item <= last_end else None
+                continue
+            if kind == self.SENTENCE_END:
+                # Writes return once the audio is in the ring; it finishes playing later
+                last_end = time.perf_counter() + self.output.buffered_seconds()
+                self.output.end_utterance()
+                self.lookahead.release()
+                continue
+            if not self.generation.is_current(gen):
+                continue
+            if gap_start is not None:
+                self.gaps.append(max(0.0, time.perf_counter() - gap_start))
+                gap_start = None
+            self.output.begin_utterance()
+            try:
+                self.play(item, gen)
+            except Exception as e:
+                print(f"Playback error: {e}")
+
+    def gap_stats(self):
+        """Count, mean and max inter-sentence silence in milliseconds."""
+        if not self.gaps:
+            return {"count": 0, "mean_ms": 0.0, "max_ms": 0.0}
+        return {"count": len(self.gaps),
+                "mean_ms": round(sum(self.gaps) / len(self.gaps) * 1000, 1),
+                "max_ms": round(max(self.gaps) * 1000, 1)}
+
+    def audio_stats(self):
+        """Inter-sentence gaps, output counters (underruns, stop-to-silence latency) and cache hits."""
+        return {"gaps": self.gap_stats(), "output": self.output.counters(), "cache": self.cache.counters()}
+
+    def start(self, sentences):
+        threading.Thread(target=self.synthesis_worker, args=(sentences,), daemon=True).start()
+        threading.Thread(target=self.playback_worker, daemon=True).start()
 
     def __del__(self):
-        if hasattr(self, 'stream'):
-            self.stream.stop_stream()
-            self.stream.close()
-        if hasattr(self, 'p'):
-            self.p.terminate()
+        if hasattr(self, 'output'):
+            self.output.close()
 
 
 # Create an instance of InstantTTS
-tts = InstantTTS(voice="af_bella")
+tts = InstantTTS(generation, voice="af_bella")
 
-# ------------------------------------------------------------------------------
-# LLM Response Streaming
-# ------------------------------------------------------------------------------
 
-sentence_endings = re.compile(r'(?<=[.!?])\s+')
-def stream_generate_response(query):
+def interrupt():
     """
-    Streams response from LLM and buffers complete sentences into sentence_queue.
+    Start a new generation and silence the speaker. The bump comes first, so a playback write
+    racing the flush sees a stale generation and is dropped.
     """
-    global messages
-    cancel_event.clear()  # Reset cancel flag
-    print(f"\n🔎 Generating response for: {query}")
-
-    if di(query):
-        print("This query involves a tool action.")
-        chat_completion = client.chat.completions.create(
-            #
-            # Required parameters
-            #
-            messages=[
-                # Set an optional system message.
-                {
-                    "role": "system",
-                    "content": """You are a highly intelligent Tool Manager. Your job is to analyze query and determine 
-                       if it requires the use of one of the following tools. For each tool, follow the instructions below.
-                       If a query is identified as needing a tool, return the function name along with the parameters 
-                       (filled appropriately) exactly as shown in the examples.
-                        If the query does not require the use of any tool, simply respond with: "no tool required"
-
-           Tools & Instructions:
-           *search_web('query')
-
-           When to use: Use this tool when the query requests real-time information or current events data, especially 
-           information post-2024.
-
-           Example Variations:
-
-           Query: "What's the latest update on Mars colonization?"
-           Output: search_web("latest update on Mars colonization")
-
-           Query: "Tell me the recent tech trends in 2025."
-           Output: search_web("recent tech trends 2025")
-
-           *send_message('recipient name', 'message')
-
-           When to use: Use this tool when the query instructs to send a text message to someone.
-
-           Example Variations:
-
-           Query: "Tell Anil I will be late today."
-           Output: send_message("Anil", "I will be late today")
-
-           Query: "Send a quick hello to Sarah."
-           Output: send_message("Sarah", "hello")
-
-           *whatsapp_call('recipient name', 'type of call')
-
-           When to use: Use when the query instructs to initiate a WhatsApp call with someone.
-
-           Example Variations:
-
-           Query: "Call John now."
-           Output: whatsapp_call("John", "voice")
-
-           Query: "I need to make a call to Priya."
-           Output: whatsapp_call("Priya", "voice")
-
-           Query: "make a video call to Priya."
-           Output: whatsapp_call("Priya", "video")
-
-           Query: "Place a video call to Rahul."
-           Output: whatsapp_call("Rahul", "video")
-
-           *read_emails()
-
-           When to use: Use when the query requests to check for new or unread emails.
-
-           Example Variations:
-
-           Query: "Check my emails."
-           Output: read_emails()
-
-           Query: "Do I have any new emails?"
-           Output: read_emails()
-
-           *send_emails('recipient name', 'message')
-
-           When to use: Use when the query instructs to send an email. Include recipient name, and message body.
-
-           Example Variations:
-
-           Query: "Email Aryan and say 'The meeting is rescheduled to 3 PM'."
-           Output: send_emails("Aryan", "The meeting is rescheduled to 3 PM")
-
-           Query: "Send an email to Ajay, message 'Let's meet for lunch tomorrow.'"
-           Output: send_emails("Ajay", "Let's meet for lunch tomorrow")
-
-           *set_reminder('time', message')
-
-           When to use: Use when the query instructs to set a reminder.
-
-           Example Variations:
-
-           Query: "Remind me to call mom at 6 PM."
-           Output: set_reminder("6 PM", "You were supposed to call your mom now.")
-
-           Query: "Set a reminder: Buy groceries in the evening."
-           Output: set_reminder("evening","Lets go Buy groceries")
-
-           *set_alarm(time)
-
-           When to use: Use when the query instructs to set an alarm.
-
-           Example Variations:
-
-           Query: "Set an alarm for 7 AM tomorrow."
-           Output: set_alarm("7 AM")
-
-           Query: "I need an alarm at 06:30."
-           Output: set_alarm("06:30")
-
-           *play_music('song_name')
-
-           When to use: Use when the query instructs to play a specific song.
+    gen = generation.next()
+    tts.stop()
+    return gen
 
-           Example Variations:
-
-           Query: "Play 'Imagine' by John Lennon."
-           Output: play_music("Imagine")
-
-           Query: "I want to listen to 'Bohemian Rhapsody'."
-           Output: play_music("Bohemian Rhapsody")
-
-           *system_check()
-
-           When to use: Use when the query instructs to run a system diagnostic or check.
-
-           Example Variations:
-
-           Query: "How is the system performing? Do a system check."
-           Output: system_check()
-
-           Query: "Run a diagnostic to see if everything's okay."
-           Output: system_check()
-
-           *get_weather()
-
-           When to use: Use when the query asks directly or indirectly about weather updates.
-
-           Example Variations:
-
-           Query: "What's the weather like today?"
-           Output: get_weather()
-
-           Query: "Do I need an umbrella? What's the weather?"
-           Output: get_weather()
-
-           *get_time()
-
-           When to use: Use when the query asks for the current time.
-
-           Example Variations:
-
-           Query: "What's the time now?"
-           Output: get_time()
-
-           Query: "Tell me the current time."
-           Output: get_time()
-
-           *open_system_app('app_name')
-
-           When to use: Use when the query instructs to open a specific system application.
-
-           Example Variations:
-
-           Query: "Open the calculator."
-           Output: open_system_app("calculator")
-
-           Query: "I need to launch the calendar app."
-           Output: open_system_app("calendar")
-
-           *control_system("setting_type", "value")
-
-           When to use: Use when the query instructs to increase/decrease/set volume or brightness.
-
-           Example Variations:
-
-           Query: "decrease the brightness 50"
-           Output: control_system("brightness", "50%")
-
-           Query: "decrease the brightness"
-           Output: control_system("brightness", "decrease")
-
-           Query: "increase the brightness to 80"
-           Output: control_system("brightness", "80%")
-
-           Query: "set brightness to full"
-           Output: control_system("brightness", "100%")
-
-           Query: "increase the volume to 80"
-           Output: control_system("volume", "80%")
+# ------------------------------------------------------------------------------
+# LLM Response Streaming
+# ------------------------------------------------------------------------------
 
-           Query: "decrease the volume"
-           Output: control_system("volume", "decrease")
+ROUTER_PROMPT = (
+    "You are a highly intelligent Tool Manager for a voice assistant. If the query needs one of "
+    "the tools, call it with arguments taken from the query. If it asks for several things that "
+    "each need a tool, make one call per thing, in the order they were asked for. If no tool is "
+    "required, simply respond with: no tool required"
+)
 
-           Query: "increase the volume"
-           Output: control_system("volume", "increase")
 
-           Query: "decrease the volume to 40"
-           Output: control_system("volume", "40%")
+def _arguments_complete(arguments):
+    try:
+        json.loads(arguments)
+        return True
+    except ValueError:
+        return False
 
-           Query: "set volume to full"
-           Output: control_system("volume", "100%")
 
-           **Overall Instructions:
-               -Analyze the query:
-               First, determine if the user's query requires a tool to be used based on the above criteria.
+def stream_tool_calls(query, labels, gen):
+    """
+    Asks the decision LLM which tool calls (if any) answer the query, offering only the tools
+    relevant to the query's intent labels as native function-calling schemas. The reply is
+    streamed, and each call is yielded as a call string the moment it is complete: a native
+    call once its JSON arguments parse, a text call once its closing parenthesis arrives.
+    Reading stops as soon as a text reply can only be "no tool required"; then nothing is yielded.
+    It also stops, closing the stream, once `gen` is no longer the current generation.
+    """
+    tools = registry.tools_for(labels)
+    stream = client.chat.completions.create(
+        messages=[
+            {"role": "system", "content": ROUTER_PROMPT},
+            *memory.recent(1),     # So follow-ups like "and tomorrow?" keep their subject
+            {"role": "user", "content": f"query: {query}"}
+        ],
 
-               -If a tool is required:
-               Output the function call with the appropriate parameters filled in, exactly as in the examples above.
+        # The language model which will generate the completion.
+        model="llama3-70b-8192",
 
-               -If no tool is required:
-               Simply output: "no tool required"
-           """
-                },
-                # Set a user message for the assistant to respond to.
-                {
-                    "role": "user",
-                    "content": f"query: {query}"
-                }
-            ],
+        tools=tools,
 
-            # The language model which will generate the completion.
-            model="llama3-70b-8192",
+        tool_choice="auto",
 
-            temperature=0,
+        temperature=0,
 
-            max_completion_tokens=1024,
+        max_completion_tokens=256,
 
-            top_p=1,
+        stream=True,
+    )
 
-            stop=None,
+    native = {}         # Streamed tool_calls by index: [name, arguments so far]
+    emitted = set()     # Indexes of native calls already yielded
+    content = ""
+    text_calls = 0      # Text calls already yielded
+    started = time.perf_counter()
+    try:
+        for chunk in stream:
+            if not generation.is_current(gen):
+                print("⏹ Abandoning the router stream of a stale query.")
+                return
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage:
+                print(f"🧾 Router prompt: {usage.prompt_tokens} tokens for {len(tools)} tools")
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            for tool_call in delta.tool_calls or []:
+                entry = native.setdefault(tool_call.index, ["", ""])
+                if tool_call.function and tool_call.function.name:
+                    entry[0] += tool_call.function.name
+                if tool_call.function and tool_call.function.arguments:
+                    entry[1] += tool_call.function.arguments
+            for index, (name, arguments) in sorted(native.items()):
+                if index not in emitted and name and _arguments_complete(arguments):
+                    emitted.add(index)
+                    print(f"⏱ Router call ready after {(time.perf_counter() - started) * 1000:.0f} ms")
+                    yield registry.render_call(name, arguments)
+
+            if delta.content:
+                content += delta.content
+                if not native and registry.rules_out_tools(content):
+                    print(f"⏱ Router ruled out tools after {(time.perf_counter() - started) * 1000:.0f} ms")
+                    return
+                calls = parser.parse_partial(content)
+                for call in calls[text_calls:]:
+                    yield call.source
+                text_calls = len(calls)
+
+        # Anything left over when the stream ends (e.g. a call without arguments)
+        for index, (name, arguments) in sorted(native.items()):
+            if index not in emitted and name:
+                yield registry.render_call(name, arguments)
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+
+
+def queue_sentences(response_generator, gen):
+    """
+    Splits a streamed ollama response into TTS-sized chunks and queues them for speech,
+    abandoning the stream as soon as `gen` is no longer the current generation.
+    Returns the text that was queued.
+    """
+    segmenter = SentenceSegmenter()
+    spoken = []
+    for chunk in response_generator:
+        if not generation.is_current(gen):
+            print("⏹ Dropping the rest of a stale response.")
+            return " ".join(spoken)
+        for sentence in segmenter.feed(chunk['message']['content']):
+            sentence_queue.put((gen, sentence))
+            spoken.append(sentence)
+            print("Queued sentence:", sentence)
+
+    # Queue any remaining text in the buffer
+    for sentence in segmenter.flush():
+        sentence_queue.put((gen, sentence))
+        spoken.append(sentence)
+        print("Queued sentence:", sentence)
+    return " ".join(spoken)
+
+
+def chatbot_stream(query):
+    return ollama.chat(
+        model="chatbot",
+        messages=memory.messages(f'query: {query}'),
+        options={'num_gpu_layers': 50},
+        stream=True
+    )
 
-            stream=False,
-        )
 
-        tool_response = ex(chat_completion.choices[0].message.content)
+def stream_generate_response(query, gen):
+    """
+    Streams response from LLM and buffers complete sentences into sentence_queue, then
+    records the exchange in memory.
+    """
+    print(f"\n🔎 Generating response for: {query}")
+    reply = ""
+    memory.last_prompt_tokens = 0      # Stays 0 if no LLM prompt is built (fast path, templates)
+    try:
+        reply = _generate_response(query, gen)
+    finally:
+        if reply:
+            memory.add_turn(query, reply)
+        if memory.last_prompt_tokens:
+            print(f"🧠 Memory: {memory.last_prompt_tokens} prompt tokens, {memory.stats()}")
+        # Playback of this reply may still be running, so these cover everything played so far
+        print(f"🔊 Audio: {tts.audio_stats()}")
+
+
+def _generate_response(query, gen):
+    """ Routes and answers the query; returns the text that was queued for speech. """
+
+    speculation = None
+    dispatch = ToolDispatch()   # Tool calls start running as soon as they are known
+    tool_call = fast_route(query)
+    if tool_call:
+        print(f"⚡ Fast path: {tool_call}")
+        dispatch.submit(tool_call)
+    elif di(query, backend=INTENT_BACKEND):
+        print("This query involves a tool action.")
+        if SPECULATIVE_ROUTING:
+            speculation = SpeculativeStream(lambda: chatbot_stream(query), speculation_stats)
+        router = stream_tool_calls(query, intent_labels(query, backend=INTENT_BACKEND), gen)
+        try:
+            for tool_call in router:
+                if not generation.is_current(gen):
+                    break       # Cancelled: don't send messages or set alarms for the old query
+                print(f"Router call: {tool_call}")
+                if speculation and not len(dispatch):
+                    speculation.cancel()
+                    print(f"🎲 Speculation cancelled: {speculation_stats.report()}")
+                dispatch.submit(tool_call)
+        except Exception as e:
+            print(f"Tool decision error: {str(e)}")
+        finally:
+            router.close()      # Closes the router's HTTP stream
+        if not generation.is_current(gen):
+            if speculation:
+                speculation.close()
+            return ""
+
+    if len(dispatch):
+        tool_response = dispatch.results()
         print(f"tool response: {tool_response}")
+        if not generation.is_current(gen):
+            return ""
+
+        # Deterministic results are spoken from templates; only open-ended ones need the helper LLM
+        sentences = render_response(tool_response, parser.parse)
+        if sentences:
+            for sentence in sentences:
+                sentence_queue.put((gen, sentence))
+                print("Queued sentence:", sentence)
+            return " ".join(sentences)
 
         try:
             response_generator = ollama.chat(
                 model="helper",
-                messages=[{'role': 'user', 'content': f'Data: {tool_response}, query: {query}'}],
+                messages=memory.messages(f'Data: {tool_response}, query: {query}'),
                 options={'num_gpu_layers': 50},
                 stream=True
             )
 
-            buffer = ""
-            for chunk in response_generator:
-                token = chunk['message']['content']
-                buffer += token
-
-                # Check for sentence completion using regex
-                while True:
-                    match = sentence_endings.search(buffer)
-                    if not match:
-                        break
-
-                    # Extract sentence up to the matched punctuation
-                    sentence = buffer[:match.end()].strip()
-                    buffer = buffer[match.end():]
-
-                    if sentence:
-                        sentence_queue.put(sentence)
-                        print("Queued sentence:", sentence)
-
-            # Queue any remaining text in the buffer
-            if buffer.strip():
-                sentence_queue.put(buffer.strip())
-                print("Queued sentence:", buffer.strip())
+            return queue_sentences(response_generator, gen)
         except Exception as e:
             print(f"Text generation error: {str(e)}")
+            return ""
     else:
         print("This query does not involve a tool action.")
         try:
-            response_generator = ollama.chat(
-                model="chatbot",
-                messages=[{'role': 'user', 'content': f'query: {query}'}],
-                options={'num_gpu_layers': 50},
-                stream=True
-            )
+            if speculation and not speculation.cancelled.is_set():
+                response_generator = speculation.commit()
+                print(f"🎲 Speculation paid off: {speculation_stats.report()}")
+            else:
+                response_generator = chatbot_stream(query)
 
-            buffer = ""
-            for chunk in response_generator:
-                token = chunk['message']['content']
-                buffer += token
-
-                # Check for sentence completion using regex
-                while True:
-                    match = sentence_endings.search(buffer)
-                    if not match:
-                        break
-
-                    # Extract sentence up to the matched punctuation
-                    sentence = buffer[:match.end()].strip()
-                    buffer = buffer[match.end():]
-
-                    if sentence:
-                        sentence_queue.put(sentence)
-                        print("Queued sentence:", sentence)
-
-            # Queue any remaining text in the buffer
-            if buffer.strip():
-                sentence_queue.put(buffer.strip())
-                print("Queued sentence:", buffer.strip())
+            return queue_sentences(response_generator, gen)
         except Exception as e:
             print(f"Text generation error: {str(e)}")
+            return ""
+        finally:
+            if speculation:
+                speculation.close()     # Stops the stream if the response went stale
 
 # ------------------------------------------------------------------------------
 # Background Processing Functions
 # ------------------------------------------------------------------------------
 
 
-def monitor_and_process():
-    """Continuously monitors sentence_queue and processes sentences with TTS."""
-    while True:
-        try:
-            sentence = sentence_queue.get(timeout=0.1)  # Wait for a sentence
-            print(f"\nProcessing: {sentence}")
-            tts.speak_sync(sentence)
-        except queue.Empty:
-            continue
-
-
 def generation_worker():
     """Processes queries from query_queue and triggers LLM response streaming."""
     while True:
-        query = query_queue.get()
-        if query is None:  # Allow graceful shutdown if needed
+        item = query_queue.get()
+        if item is None:  # Allow graceful shutdown if needed
             break
-        stream_generate_response(query)
+        gen, query = item
+        if generation.is_current(gen):  # Superseded queries are skipped
+            stream_generate_response(query, gen)
 
 
 def listen_for_query():
     global is_sleeping
     """
     Listens continuously for user speech input and enqueues valid queries.
-    Commands containing "Siri" are checked for a "stop" command.
+    The local VAD decides where each utterance ends; only utterances reach the ASR backend
+    (ASR_BACKEND=google|vosk). While asleep, the on-device wake-word spotter screens utterances
+    first, so background speech is never sent to ASR (until templates are enrolled, the ASR
+    text is searched for the wake word as before). Commands containing "stop" cancel the
+    current generation.
     """
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone()
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-        print("🎤 Listening... Speak now!")
-        while True:
-            try:
-                audio = recognizer.listen(source, timeout=1)
-                text = recognizer.recognize_google(audio)
-                print(f"You said: {text}")
-                keyboard.send('stop media')
-                if WAKE_WORD in text.lower():
-                    print(f"{WAKE_WORD} is awake now.")
-                    is_sleeping = False
-                print(f"📝 {text}")
-                if not is_sleeping:
-                    if "stop" in text.lower():
-                        cancel_event.set()
-                        print("\n🛑 Stopped the current generation. Listening for the next query.")
-                        continue
-                    if text.lower() != WAKE_WORD:
-                        add_query(text)
-                    else:
-                        tts.speak_sync(f"{get_greeting()}, {USER}")
-                    start_sleep_timer()
-                else:
-                    print("Sleeping...")
-            except sr.WaitTimeoutError:
+    asr = create_asr()
+    spotter = WakeWordSpotter()
+    endpointer = Endpointer(EnergyVAD())
+    print(f"🎤 Listening ({asr.name}, wake word {'on-device' if spotter.ready else 'via ASR'})... Speak now!")
+    for utterance in endpointer.utterances(MicrophoneSource()):
+        woke = False
+        if is_sleeping and spotter.ready:
+            if not spotter.detect(utterance.samples):
                 continue
-            except sr.UnknownValueError:
+            woke = True
+        try:
+            text = asr.transcribe(utterance.samples)
+        except ASRError as e:
+            print(f"⚠ {e}")
+            continue
+        if not text and not woke:
+            continue
+        print(f"You said: {text}")
+        keyboard.send('stop media')
+        if woke or WAKE_WORD in text.lower():
+            print(f"{WAKE_WORD} is awake now.")
+            is_sleeping = False
+        print(f"📝 {text}")
+        if not is_sleeping:
+            if "stop" in text.lower():
+                interrupt()
+                print("\n🛑 Stopped the current generation. Listening for the next query.")
                 continue
-            except sr.RequestError:
-                print("⚠ Could not connect to Google's Speech API.")
+            if text.strip().lower() not in ("", WAKE_WORD):
+                add_query(text)
+            else:
+                sentence_queue.put((generation.current, f"{get_greeting()}, {USER}"))
+            start_sleep_timer()
+        else:
+            print("Sleeping...")
 
 
 def add_query(query):
@@ -518,10 +584,7 @@ def add_query(query):
     Stops any ongoing generation and enqueues a new query.
     """
     print("\n⛔ Stopping previous generation (if any)...")
-    cancel_event.set()
-    time.sleep(0.1)
-    query_queue.queue.clear()  # Clear any previous queries
-    query_queue.put(query)
+    query_queue.put((interrupt(), query))
     print("✅ New query submitted.")
 
 # ------------------------------------------------------------------------------
@@ -529,9 +592,19 @@ def add_query(query):
 # ------------------------------------------------------------------------------
 
 
+def speak_reminder(item):
+    """ Scheduler handler: reminders are spoken through the normal TTS queue. """
+    sentence_queue.put((generation.current, f"Reminder: {item.message}"))
+
+
 def main():
-    # Start thread to process sentences with TTS
-    threading.Thread(target=monitor_and_process, daemon=True).start()
+    scheduler.on("reminder", speak_reminder)
+    # Restore only now, so reminders missed while we were down are spoken rather than printed
+    scheduler.restore()
+    scheduler.start()
+    # Start the TTS synthesis and playback threads
+    tts.warm_up(WARMUP_PHRASES)
+    tts.start(sentence_queue)
     # Start thread for LLM generation worker
     threading.Thread(target=generation_worker, daemon=True).start()
     # Start listening for queries (blocking call)
@@ -0,0 +1,183 @@
+"""
+Asynchronous outbox for WhatsApp messages and calls.
+
+send_message / whatsapp_call used to drive WhatsApp Desktop on the generation thread, sleeping
+for three seconds per message. The Outbox queues the request and returns at once; a worker
+thread delivers it through a Transport. Messages to the same contact that are still waiting
+within COALESCE_WINDOW seconds are merged into one delivery. Every request keeps a status
+("queued", "sending", "sent", "failed") that can be looked up afterwards.
+"""
+import os
+import platform
+import threading
+import time
+import urllib.parse
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+COALESCE_WINDOW = 1.5   # Seconds a message waits for follow-ups to the same contact
+MAX_HISTORY = 200       # Finished requests remembered for status queries
+
+
+class Transport(ABC):
+    """ Delivers one message or call. Raise an exception to mark the request as failed. """
+    name = "transport"
+
+    @abstractmethod
+    def send_message(self, number, text):
+        pass
+
+    @abstractmethod
+    def call(self, number, call_type):
+        pass
+
+
+class WhatsAppDesktopTransport(Transport):
+    """ WhatsApp Desktop on Windows: opens whatsapp:// URLs and presses Enter to send. """
+    name = "whatsapp"
+
+    def __init__(self, open_delay=2, send_delay=1):
+        self.open_delay = open_delay
+        self.send_delay = send_delay
+
+    def send_message(self, number, text):
+        import pyautogui
+
+        # Open the chat first so WhatsApp is running, then load the message into it
+        os.startfile(f"whatsapp://send?phone={number}")
+        time.sleep(self.open_delay)
+        os.startfile(f"whatsapp://send?phone={number}&text={urllib.parse.quote(text)}")
+
+        # Simulate Enter key press to send the message
+        time.sleep(self.send_delay)
+        pyautogui.press('enter')
+
+    def call(self, number, call_type):
+        # Form the WhatsApp call URL based on call type
+        if call_type == "voice":
+            os.startfile(f"whatsapp://call?phone={number}")
+        else:
+            os.startfile(f"whatsapp://video?phone={number}")
+
+
+class LoggingTransport(Transport):
+    """ Prints deliveries and keeps them in memory; used on Linux and for testing. """
+    name = "log"
+
+    def __init__(self):
+        self.delivered = []
+
+    def send_message(self, number, text):
+        print(f"[outbox] message to {number}: {text}")
+        self.delivered.append(("message", number, text))
+
+    def call(self, number, call_type):
+        print(f"[outbox] {call_type} call to {number}")
+        self.delivered.append(("call", number, call_type))
+
+
+def create_transport(name=None):
+    """ OUTBOX_TRANSPORT=whatsapp|log; defaults to WhatsApp Desktop on Windows, logging elsewhere. """
+    name = name or os.getenv("OUTBOX_TRANSPORT") or ("whatsapp" if platform.system() == "Windows" else "log")
+    if name == "whatsapp":
+        return WhatsAppDesktopTransport()
+    return LoggingTransport()
+
+
+class OutboundItem:
+    __slots__ = ("id", "kind", "name", "number", "text", "status", "error", "ready_at", "updated")
+
+    def __init__(self, kind, name, number, text, ready_at):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind            # "message", "voice" or "video"
+        self.name = name
+        self.number = number
+        self.text = text
+        self.status = "queued"
+        self.error = None
+        self.ready_at = ready_at
+        self.updated = time.time()
+
+    def as_dict(self):
+        return {"id": self.id, "to": self.name, "kind": self.kind, "text": self.text,
+                "status": self.status, "error": self.error}
+
+
+class Outbox:
+    def __init__(self, transport, coalesce_window=COALESCE_WINDOW, max_history=MAX_HISTORY):
+        self.transport = transport
+        self.coalesce_window = coalesce_window
+        self.max_history = max_history
+        self.pending = deque()
+        self.items = OrderedDict()  # id -> OutboundItem, oldest first
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+        self.thread.start()
+
+    def send_message(self, name, number, text):
+        """ Queue a message; returns the request (possibly an earlier one it was merged into). """
+        with self.cond:
+            for item in self.pending:
+                if item.kind == "message" and item.number == number:
+                    item.text = f"{item.text}\n{text}"
+                    item.updated = time.time()
+                    return item
+            return self._enqueue(OutboundItem("message", name, number, text, time.monotonic() + self.coalesce_window))
+
+    def call(self, name, number, call_type):
+        """ Queue a call; calls are never merged or delayed. """
+        with self.cond:
+            return self._enqueue(OutboundItem(call_type, name, number, None, time.monotonic()))
+
+    def _enqueue(self, item):
+        self.pending.append(item)
+        self.items[item.id] = item
+        while len(self.items) > self.max_history:
+            oldest = next(iter(self.items.values()))
+            if oldest.status in ("queued", "sending"):
+                break
+            self.items.popitem(last=False)
+        self.cond.notify()
+        return item
+
+    def status(self, item_id):
+        with self.cond:
+            item = self.items.get(item_id)
+            return item.as_dict() if item else None
+
+    def history(self, name=None):
+        """ Requests (optionally only those to `name`), newest first. """
+        with self.cond:
+            items = [i for i in self.items.values() if name is None or i.name.lower() == name.lower()]
+        return [i.as_dict() for i in reversed(items)]
+
+    def _next_ready(self):
+        with self.cond:
+            while True:
+                if not self.pending:
+                    self.cond.wait()
+                    continue
+                item = min(self.pending, key=lambda i: i.ready_at)
+                wait = item.ready_at - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                self.pending.remove(item)
+                item.status = "sending"
+                return item
+
+    def _run(self):
+        while True:
+            item = self._next_ready()
+            try:
+                if item.kind == "message":
+                    self.transport.send_message(item.number, item.text)
+                else:
+                    self.transport.call(item.number, item.kind)
+                status, error = "sent", None
+            except Exception as e:
+                status, error = "failed", str(e)
+                print(f"Error delivering {item.kind} to {item.name}: {e}")
+            with self.cond:
+                item.status, item.error, item.updated = status, error, time.time()
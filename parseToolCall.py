@@ -0,0 +1,122 @@
+"""
+Parses tool calls out of raw decision-LLM output without eval.
+
+The LLM is asked for something like get_weather() or control_system("volume", "80%"), but its
+replies may carry prose, markdown fences or several calls. ToolCallParser finds every call in
+the text, accepts only literal arguments (strings, numbers, booleans, None), checks them against
+the signature of the target function and caches the parsed form per distinct reply.
+"""
+import ast
+import inspect
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+ToolCall = namedtuple("ToolCall", ["name", "args", "kwargs", "source"])
+ToolCallError = namedtuple("ToolCallError", ["source", "error"])
+
+_CALL_START = re.compile(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\(")
+
+
+def _call_end(text, open_index):
+    """ Index just past the ')' that closes the '(' at open_index, skipping string literals. """
+    depth = 0
+    quote = None
+    i = open_index
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == "\\":
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return None
+
+
+def _literal_call(source):
+    """ Return (name, args, kwargs) if source is a single call with literal-only arguments, else None. """
+    try:
+        node = ast.parse(source, mode="eval").body
+    except SyntaxError:
+        return None
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        return None
+    try:
+        args = tuple(ast.literal_eval(arg) for arg in node.args)
+        kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg is not None}
+    except ValueError:
+        return None
+    if len(kwargs) != len(node.keywords):   # **kwargs unpacking
+        return None
+    for value in (*args, *kwargs.values()):
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            return None
+    return node.func.id, args, kwargs
+
+
+class ToolCallParser:
+    """
+    parse(text) returns a tuple of ToolCall / ToolCallError in the order the calls appear.
+    A reply with no calls at all (e.g. "no tool required") parses to an empty tuple.
+    """
+    def __init__(self, functions, cache_size=256):
+        self.signatures = {name: inspect.signature(func) for name, func in functions.items()}
+        self.parse = lru_cache(maxsize=cache_size)(self._parse)
+
+    def validate(self, name, args, kwargs, source):
+        """ Bind the arguments to the tool's signature; returns a ToolCall or a ToolCallError. """
+        if name not in self.signatures:
+            return ToolCallError(source, f"Function '{name}' is not defined.")
+        try:
+            self.signatures[name].bind(*args, **kwargs)
+        except TypeError as e:
+            return ToolCallError(source, f"Invalid arguments for '{name}': {e}")
+        return ToolCall(name, args, kwargs, source)
+
+    def parse_partial(self, text):
+        """
+        Like parse, for a reply that is still streaming: uncached, and a call that is not closed
+        yet is left out instead of being reported as unterminated.
+        """
+        results = self._parse(text)
+        if results and isinstance(results[-1], ToolCallError) and results[-1].error == "Unterminated call.":
+            results = results[:-1]
+        return results
+
+    def _parse(self, text):
+        results = []
+        pos = 0
+        while True:
+            match = _CALL_START.search(text, pos)
+            if not match:
+                break
+            end = _call_end(text, match.end() - 1)
+            if end is None:
+                if match.group(1) in self.signatures:
+                    results.append(ToolCallError(text[match.start():].strip(), "Unterminated call."))
+                    break
+                pos = match.end()
+                continue
+
+            source = text[match.start():end]
+            parsed = _literal_call(source)
+            if parsed is None:
+                if match.group(1) in self.signatures:
+                    results.append(ToolCallError(source, "Arguments must be literal strings or numbers."))
+                    pos = end
+                else:
+                    pos = match.end()   # Prose such as "call(s)": keep scanning inside it
+                continue
+
+            results.append(self.validate(*parsed, source))
+            pos = end
+        return tuple(results)
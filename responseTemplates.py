@@ -0,0 +1,108 @@
+"""
+Speakable sentences for deterministic tool results.
+
+Most tools return something fixed ("Volume set to 80%", the time, a weather JSON), and running
+it through the helper LLM only to rephrase it costs a whole generation. render_response turns
+a list of executeTool results into sentences for sentence_queue with one template per tool.
+It returns None when any result is open-ended (web search, system reports) or has no template,
+and the caller then falls back to the helper LLM for the whole reply.
+"""
+import json
+
+# Results that need summarising rather than reading out
+LLM_TOOLS = {"search_web", "system_check"}
+
+NO_RAIN = "No rain expected."
+NO_RAIN_FORECAST = "It shouldn't rain."
+NO_WEATHER = "Sorry, I couldn't get the weather right now."
+TOOL_FAILED = "Sorry, I couldn't do that."
+
+# Sentences that are spoken word for word, for pre-rendering into the TTS cache
+FIXED_SENTENCES = [NO_RAIN, NO_RAIN_FORECAST, NO_WEATHER, TOOL_FAILED]
+
+
+def _sentence(text):
+    text = str(text).strip()
+    return text if text[-1:] in ".!?" else text + "."
+
+
+def _number(value):
+    return f"{value:.0f}"
+
+
+def _weather(result, args):
+    data = json.loads(result)
+    if "error" in data:
+        return [NO_WEATHER]
+    sentences = [f"It's {_number(data['current_temperature_celsius'])} degrees with "
+                 f"{_number(data['humidity_percent'])}% humidity."]
+    rain = data.get("chance_of_rain_percent") or 0
+    if rain >= 50:
+        sentences.append(f"There's a {_number(rain)}% chance of rain, so take an umbrella.")
+    elif rain >= 20:
+        sentences.append(f"There's a {_number(rain)}% chance of rain.")
+    else:
+        sentences.append(NO_RAIN)
+    return sentences
+
+
+def _forecast(result, args):
+    data = json.loads(result)
+    if "error" in data:
+        return [f"Sorry, {_sentence(data['error'])}"]
+    when = data.get("when") or (args[0] if args else "then")
+    low, high = _number(data["min_temperature_celsius"]), _number(data["max_temperature_celsius"])
+    temperature = f"{low} degrees" if low == high else f"between {low} and {high} degrees"
+    sentences = [f"For {when}, expect {temperature}."]
+    if data.get("conditions"):
+        sentences.append(f"Conditions: {', '.join(data['conditions'])}.")
+    if data.get("will_it_rain"):
+        sentences.append(f"It will probably rain, with up to a {_number(data['max_chance_of_rain_percent'])}% chance.")
+    else:
+        sentences.append(NO_RAIN_FORECAST)
+    return sentences
+
+
+def _passthrough(result, args):
+    return [_sentence(result)]
+
+
+# tool name -> function(result, args) returning a list of sentences
+TEMPLATES = {
+    "get_time": lambda result, args: [f"It's {result}."],
+    "get_weather": _weather,
+    "get_forecast": _forecast,
+    "set_alarm": _passthrough,
+    "set_reminder": _passthrough,
+    "control_system": _passthrough,
+    "whatsapp_call": _passthrough,
+    "get_message_status": _passthrough,
+    "send_message": lambda result, args: [_sentence(result.replace(" queued", " is on its way"))],
+    "open_system_app": _passthrough,
+    "play_music": _passthrough,
+}
+
+
+def render_response(results, parse):
+    """
+    Sentences for a list of {"tool", "call", "result" | "error"} entries, or None if the helper
+    LLM should answer instead. `parse` recovers a call's arguments from its source
+    (executeTool.parser.parse).
+    """
+    sentences = []
+    for entry in results:
+        tool = entry.get("tool")
+        if "error" in entry:
+            # Parser and timeout errors are meant for the log, not to be read out
+            if TOOL_FAILED not in sentences:
+                sentences.append(TOOL_FAILED)
+            continue
+        if tool in LLM_TOOLS or tool not in TEMPLATES:
+            return None
+        calls = parse(entry["call"])
+        args = calls[0].args if calls and hasattr(calls[0], "args") else ()
+        try:
+            sentences += TEMPLATES[tool](entry["result"], args)
+        except (ValueError, KeyError, TypeError):
+            return None     # Unexpected shape: let the LLM make sense of it
+    return sentences or None
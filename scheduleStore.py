@@ -0,0 +1,61 @@
+"""
+Durable journal for scheduled alarms and reminders.
+
+Items are rows in a SQLite database in WAL mode with synchronous=NORMAL: scheduling, firing or
+cancelling an item is one small append to the write-ahead log, and a restart reloads every
+pending item with a single indexed query. Fired and cancelled rows are deleted by compact().
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEDULE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "schedule.db")
+
+
+class ScheduleStore:
+    def __init__(self, path=SCHEDULE_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, due REAL NOT NULL,"
+            " message TEXT NOT NULL, state TEXT NOT NULL DEFAULT 'pending')"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_state_due ON items (state, due)")
+
+    def save(self, item):
+        """ Insert or reschedule an item as pending. """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO items (id, kind, due, message, state) VALUES (?, ?, ?, ?, 'pending')",
+                (item.id, item.kind, item.due.timestamp(), item.message),
+            )
+
+    def mark(self, item_ids, state):
+        """ Move items out of 'pending' ('fired', 'cancelled' or 'missed'). """
+        with self.lock:
+            self.conn.executemany("UPDATE items SET state = ? WHERE id = ?", [(state, i) for i in item_ids])
+
+    def pending(self):
+        """ (id, kind, due datetime, message) for every pending item, soonest first. """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, due, message FROM items WHERE state = 'pending' ORDER BY due"
+            ).fetchall()
+        return [(item_id, kind, datetime.fromtimestamp(due), message) for item_id, kind, due, message in rows]
+
+    def compact(self):
+        """ Delete everything that is no longer pending and fold the WAL back into the database. """
+        with self.lock:
+            deleted = self.conn.execute("DELETE FROM items WHERE state != 'pending'").rowcount
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,178 @@
+"""
+Single-thread timer scheduler for alarms and reminders.
+
+Pending items live in a min-heap ordered by their monotonic deadline. One daemon thread sleeps
+until the earliest deadline (or until a new item / cancellation wakes it) and hands due items
+to the handler registered for their kind. Handlers run on the scheduler thread, so they must
+return quickly (start playback, queue speech) rather than block.
+
+With a ScheduleStore attached, every change is journaled and restore() reschedules what was
+still pending when the process stopped. Items that came due while it was down are handled per
+kind by MISSED_GRACE: fired late if missed by at most that many seconds (None: always fire),
+otherwise dropped as missed.
+"""
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Seconds an item may be overdue at restore time and still fire (None = no limit)
+MISSED_GRACE = {"alarm": 600, "reminder": None}
+COMPACT_EVERY = 100     # Fired/cancelled rows to accumulate before compacting the journal
+
+
+class ScheduledItem:
+    __slots__ = ("id", "kind", "due", "message", "deadline")
+
+    def __init__(self, item_id, kind, due, message, deadline):
+        self.id = item_id
+        self.kind = kind
+        self.due = due              # Wall-clock datetime, for display and persistence
+        self.message = message
+        self.deadline = deadline    # time.monotonic() value the scheduler waits for
+
+    def __repr__(self):
+        return f"ScheduledItem({self.id!r}, {self.kind!r}, {self.due:%Y-%m-%d %H:%M:%S}, {self.message!r})"
+
+
+class TimerScheduler:
+    def __init__(self, store=None, missed_grace=None):
+        self.store = store
+        self.missed_grace = MISSED_GRACE if missed_grace is None else missed_grace
+        self.retired = 0            # Rows marked fired/cancelled since the last compaction
+        self.heap = []              # (deadline, seq, item_id); cancelled entries are skipped lazily
+        self.items = {}             # item_id -> ScheduledItem still pending
+        self.handlers = {}          # kind -> callable(item)
+        self.last_fired = None
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def on(self, kind, handler):
+        """ Register the callable that receives due items of this kind. """
+        self.handlers[kind] = handler
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self.thread.start()
+
+    def schedule(self, kind, due, message="", item_id=None):
+        """ Schedule an item for the wall-clock datetime `due`; returns the ScheduledItem. """
+        deadline = time.monotonic() + max(0.0, (due - datetime.now()).total_seconds())
+        item = ScheduledItem(item_id or uuid.uuid4().hex[:8], kind, due, message, deadline)
+        if self.store is not None:
+            self.store.save(item)
+        with self.cond:
+            self._push(item)
+            self.cond.notify()
+        return item
+
+    def restore(self):
+        """
+        Reload pending items from the store in one pass and rebuild the heap. Returns
+        (rescheduled, missed) counts.
+        """
+        if self.store is None:
+            return 0, 0
+        self.store.compact()
+
+        now, mono = datetime.now(), time.monotonic()
+        restored, missed = [], []
+        for item_id, kind, due, message in self.store.pending():
+            overdue = (now - due).total_seconds()
+            grace = self.missed_grace.get(kind)
+            if overdue > 0 and grace is not None and overdue > grace:
+                missed.append(item_id)
+                continue
+            restored.append(ScheduledItem(item_id, kind, due, message, mono + max(0.0, -overdue)))
+
+        if missed:
+            self.store.mark(missed, "missed")
+            print(f"Dropped {len(missed)} scheduled item(s) that were missed while offline.")
+        with self.cond:
+            for item in restored:
+                self.items[item.id] = item
+                self.heap.append((item.deadline, next(self.seq), item.id))
+            heapq.heapify(self.heap)
+            self.cond.notify()
+        return len(restored), len(missed)
+
+    def _retire(self, item_id, state):
+        if self.store is None:
+            return
+        self.store.mark([item_id], state)
+        self.retired += 1
+        if self.retired >= COMPACT_EVERY:
+            self.retired = 0
+            self.store.compact()
+
+    def _push(self, item):
+        self.items[item.id] = item
+        heapq.heappush(self.heap, (item.deadline, next(self.seq), item.id))
+
+    def cancel(self, item_id):
+        """ Cancel a pending item. Returns the cancelled item, or None if it was not pending. """
+        with self.cond:
+            item = self.items.pop(item_id, None)
+            self.cond.notify()
+        if item is not None:
+            self._retire(item_id, "cancelled")
+        return item
+
+    def snooze(self, item_id=None, minutes=5):
+        """
+        Push an item `minutes` into the future. Without an id, snoozes the item that fired last
+        (the ringing alarm). Returns the rescheduled item, or None if there is nothing to snooze.
+        """
+        with self.cond:
+            item = self.items.pop(item_id, None) if item_id else self.last_fired
+            if item is None:
+                return None
+            item.due = datetime.now() + timedelta(minutes=minutes)
+            item.deadline = time.monotonic() + minutes * 60
+            self._push(item)
+            self.cond.notify()
+        if self.store is not None:
+            self.store.save(item)
+        return item
+
+    def list(self, kind=None):
+        """ Pending items, soonest first. """
+        with self.cond:
+            items = [item for item in self.items.values() if kind is None or item.kind == kind]
+        return sorted(items, key=lambda item: item.deadline)
+
+    def _pop_due(self):
+        """ Wait until the earliest pending item is due, then remove and return it. """
+        with self.cond:
+            while True:
+                while self.heap and (self.heap[0][2] not in self.items
+                                     or self.items[self.heap[0][2]].deadline != self.heap[0][0]):
+                    heapq.heappop(self.heap)    # Cancelled or snoozed since it was pushed
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                remaining = self.heap[0][0] - time.monotonic()
+                if remaining > 0:
+                    self.cond.wait(remaining)
+                    continue
+                _, _, item_id = heapq.heappop(self.heap)
+                item = self.items.pop(item_id)
+                self.last_fired = item
+                return item
+
+    def _run(self):
+        while True:
+            item = self._pop_due()
+            self._retire(item.id, "fired")
+            handler = self.handlers.get(item.kind)
+            if handler is None:
+                print(f"No handler for {item.kind}: {item.message}")
+                continue
+            try:
+                handler(item)
+            except Exception as e:
+                print(f"An error occurred while firing {item.kind} {item.id}: {e}")
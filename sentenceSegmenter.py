@@ -0,0 +1,107 @@
+"""
+Incremental sentence segmenter for the LLM token stream.
+
+feed() appends a token and returns the chunks that became complete; every character is
+examined once, because scanning resumes where the previous call stopped. A period only ends a
+sentence when whitespace follows it and the word before it is not an abbreviation ("Dr.",
+"e.g.") or an initial; "3.5" never splits because no whitespace follows its period. Chunks
+shorter than min_chars are merged with the next sentence so TTS does not pause after every
+fragment, and text running past max_chars is split at the last comma or space. With
+first_chunk_early, the first chunk may also end at a comma, colon or semicolon once it has
+first_min_chars characters, so the first audio starts sooner.
+"""
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e",
+    "inc", "ltd", "co", "no", "fig", "approx", "dept", "est", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "u.s", "a.m", "p.m",
+}
+SENTENCE_END = ".!?"
+CLAUSE_END = ",;:"
+CLOSERS = "\"')]}”’"
+_PENDING = -1   # _boundary: cannot tell until more text arrives
+
+
+class SentenceSegmenter:
+    def __init__(self, min_chars=20, max_chars=240, first_chunk_early=True, first_min_chars=12):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.first_chunk_early = first_chunk_early
+        self.first_min_chars = first_min_chars
+        self.buffer = ""        # Text not yet emitted
+        self.scan = 0           # Index in buffer where scanning resumes
+        self.soft_break = 0     # End of the last clause/word boundary seen, for max_chars splits
+        self.emitted = 0
+
+    def _is_abbreviation(self, end):
+        """ True if the word ending at buffer[end] (the period) is an abbreviation or initial. """
+        start = self.buffer.rfind(" ", 0, end) + 1
+        word = self.buffer[start:end].lstrip("\"'([{").lower()
+        return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+    def _boundary(self, i):
+        """
+        Index just past a chunk ending at buffer[i], None if no chunk ends there, or _PENDING
+        if closing quotes/brackets run to the end of the buffer and the answer needs more text.
+        """
+        buffer = self.buffer
+        char = buffer[i]
+        if char == "\n":
+            return i + 1
+        early = self.first_chunk_early and self.emitted == 0
+        if char not in SENTENCE_END and not (early and char in CLAUSE_END):
+            return None
+
+        end = i + 1
+        while end < len(buffer) and buffer[end] in CLOSERS:
+            end += 1
+        if end >= len(buffer):
+            return _PENDING
+        if not buffer[end].isspace():
+            return None
+        if char == "." and self._is_abbreviation(i):
+            return None
+        return end
+
+    def _take(self, end):
+        chunk = self.buffer[:end].strip()
+        self.buffer = self.buffer[end:]
+        self.scan = 0
+        self.soft_break = 0
+        if chunk:
+            self.emitted += 1
+        return chunk
+
+    def feed(self, token):
+        """ Add streamed text; returns the list of chunks completed by it. """
+        self.buffer += token
+        chunks = []
+        # The last character can only be judged once the next one arrives
+        while self.scan < len(self.buffer) - 1:
+            i = self.scan
+            end = self._boundary(i)
+            if end == _PENDING:
+                break       # Resume at this character once the closers are followed by something
+            self.scan += 1
+            if end is None:
+                if self.buffer[i] in CLAUSE_END or self.buffer[i] == " ":
+                    self.soft_break = i + 1
+            else:
+                minimum = self.first_min_chars if self.emitted == 0 and self.first_chunk_early else self.min_chars
+                if len(self.buffer[:end].strip()) >= minimum:
+                    chunk = self._take(end)
+                    if chunk:
+                        chunks.append(chunk)
+                    continue
+                self.soft_break = end
+
+            if self.scan >= self.max_chars and self.soft_break:
+                chunk = self._take(self.soft_break)
+                if chunk:
+                    chunks.append(chunk)
+        return chunks
+
+    def flush(self):
+        """ Return whatever is left at the end of the stream. """
+        chunk = self._take(len(self.buffer))
+        return [chunk] if chunk else []
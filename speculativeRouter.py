@@ -0,0 +1,105 @@
+"""
+Speculative chatbot stream for queries the intent gate flags as tool queries.
+
+The keyword gate is generous ("what", "set", "check" ...), so many flagged queries end with
+the router answering "no tool required", and the chatbot stream only starts after that round
+trip. A SpeculativeStream starts the chatbot stream at the same time as the router call and
+buffers its chunks without speaking them. When the router decides, the stream is either
+committed (buffered chunks first, then the live stream) or cancelled, which closes it.
+SpeculationStats counts how often speculation paid off and how much time it saved.
+"""
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = 0
+        self.committed = 0          # Router said "no tool": the buffered answer was used
+        self.cancelled = 0          # Router picked a tool: the chatbot work was wasted
+        self.saved = 0.0            # Seconds of chatbot generation done before the commit
+        self.wasted_chunks = 0
+
+    def record(self, committed, head_start, chunks):
+        with self.lock:
+            if committed:
+                self.committed += 1
+                self.saved += head_start
+            else:
+                self.cancelled += 1
+                self.wasted_chunks += chunks
+
+    def report(self):
+        with self.lock:
+            decided = self.committed + self.cancelled
+            return {
+                "started": self.started,
+                "paid_off": self.committed,
+                "cancelled": self.cancelled,
+                "hit_rate": round(self.committed / decided, 3) if decided else 0.0,
+                "mean_saved_ms": round(self.saved / self.committed * 1000, 1) if self.committed else 0.0,
+                "wasted_chunks": self.wasted_chunks,
+            }
+
+
+class SpeculativeStream:
+    """
+    Runs start_stream() on a background thread and buffers what it yields until the owner
+    calls commit() (to consume it) or cancel() (to stop it).
+    """
+    def __init__(self, start_stream, stats=None):
+        self.stats = stats
+        self.chunks = queue.Queue()
+        self.cancelled = threading.Event()
+        self.received = 0
+        self.started_at = time.perf_counter()
+        if stats:
+            with stats.lock:
+                stats.started += 1
+        self.thread = threading.Thread(target=self._run, args=(start_stream,), name="speculation", daemon=True)
+        self.thread.start()
+
+    def _run(self, start_stream):
+        stream = None
+        try:
+            stream = start_stream()
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    break
+                self.received += 1
+                self.chunks.put(chunk)
+        except Exception as e:
+            self.chunks.put(e)
+        finally:
+            if self.cancelled.is_set() and hasattr(stream, "close"):
+                stream.close()      # Drops the HTTP stream so the model stops generating
+            self.chunks.put(_DONE)
+
+    def commit(self):
+        """ Use the speculative answer: returns an iterator over buffered, then live chunks. """
+        if self.stats:
+            self.stats.record(True, time.perf_counter() - self.started_at, self.received)
+        return self._drain()
+
+    def _drain(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is _DONE:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def cancel(self):
+        """ Discard the speculative answer. """
+        self.close()
+        if self.stats:
+            self.stats.record(False, time.perf_counter() - self.started_at, self.received)
+
+    def close(self):
+        """ Stop the background stream at its next chunk without recording a decision. """
+        self.cancelled.set()
@@ -0,0 +1,236 @@
+"""
+Volume and brightness control behind tools.control_system.
+
+A ControlBackend reads and writes levels in percent: pycaw / screen-brightness-control on
+Windows, wpctl or pactl plus the sysfs backlight on Linux, or an in-memory FakeBackend for
+tests. SystemController owns the backend on one thread, so device handles are opened once and
+stay open, and it coalesces bursts: commands arriving within DEBOUNCE seconds of each other are
+applied one after another to the level read at the start of the burst and written to the
+hardware once. Levels are not kept between bursts, since media keys or the OS slider may have
+changed them in the meantime.
+"""
+import glob
+import os
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+SETTINGS = ("volume", "brightness")
+STEP = 20           # Percent per "increase" / "decrease"
+DEBOUNCE = 0.05     # Seconds of quiet that end a burst of commands
+
+
+class ControlBackend(ABC):
+    name = "backend"
+
+    def open(self):
+        """ Called once on the controller thread before the first get/set. """
+
+    @abstractmethod
+    def get(self, setting):
+        pass
+
+    @abstractmethod
+    def set(self, setting, percent):
+        pass
+
+
+class WindowsBackend(ControlBackend):
+    """ pycaw endpoint volume (kept open) and screen-brightness-control. """
+    name = "windows"
+
+    def open(self):
+        # COM objects belong to the thread that created them, so everything happens here
+        import comtypes
+        from comtypes import CLSCTX_ALL
+        from ctypes import cast, POINTER
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        import screen_brightness_control
+
+        comtypes.CoInitialize()
+        interface = AudioUtilities.GetSpeakers().Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume = cast(interface, POINTER(IAudioEndpointVolume))
+        self.sbc = screen_brightness_control
+
+    def get(self, setting):
+        if setting == "volume":
+            return round(self.volume.GetMasterVolumeLevelScalar() * 100)
+        return self.sbc.get_brightness()[0]  # Assuming a single monitor
+
+    def set(self, setting, percent):
+        if setting == "volume":
+            self.volume.SetMasterVolumeLevelScalar(percent / 100.0, None)
+        else:
+            self.sbc.set_brightness(percent)
+
+
+class LinuxBackend(ControlBackend):
+    """ PipeWire (wpctl) or PulseAudio (pactl) for volume, /sys/class/backlight for brightness. """
+    name = "linux"
+
+    def open(self):
+        self.wpctl = shutil.which("wpctl")
+        self.pactl = shutil.which("pactl")
+        self.backlight = None
+        devices = sorted(glob.glob("/sys/class/backlight/*"))
+        if devices:
+            with open(os.path.join(devices[0], "max_brightness")) as f:
+                self.max_brightness = int(f.read())
+            # Held open for the life of the controller; requires write access to the device
+            self.backlight = open(os.path.join(devices[0], "brightness"), "r+")
+
+    def _run(self, *args):
+        return subprocess.run(args, check=True, capture_output=True, text=True, timeout=2).stdout
+
+    def get(self, setting):
+        if setting == "brightness":
+            if self.backlight is None:
+                raise RuntimeError("No backlight device found.")
+            self.backlight.seek(0)
+            return round(int(self.backlight.read()) * 100 / self.max_brightness)
+        if self.wpctl:
+            # "Volume: 0.40" (optionally followed by "[MUTED]")
+            output = self._run(self.wpctl, "get-volume", "@DEFAULT_AUDIO_SINK@")
+            return round(float(re.search(r"[\d.]+", output).group()) * 100)
+        if self.pactl:
+            output = self._run(self.pactl, "get-sink-volume", "@DEFAULT_SINK@")
+            return int(re.search(r"(\d+)%", output).group(1))
+        raise RuntimeError("Neither wpctl nor pactl is available.")
+
+    def set(self, setting, percent):
+        if setting == "brightness":
+            if self.backlight is None:
+                raise RuntimeError("No backlight device found.")
+            self.backlight.seek(0)
+            self.backlight.write(str(round(percent * self.max_brightness / 100)))
+            self.backlight.flush()
+        elif self.wpctl:
+            self._run(self.wpctl, "set-volume", "@DEFAULT_AUDIO_SINK@", f"{percent / 100:.2f}")
+        elif self.pactl:
+            self._run(self.pactl, "set-sink-volume", "@DEFAULT_SINK@", f"{percent}%")
+        else:
+            raise RuntimeError("Neither wpctl nor pactl is available.")
+
+
+class FakeBackend(ControlBackend):
+    """ In-memory levels; `writes` records every hardware write for tests. """
+    name = "fake"
+
+    def __init__(self, volume=50, brightness=50):
+        self.levels = {"volume": volume, "brightness": brightness}
+        self.writes = []
+
+    def get(self, setting):
+        return self.levels[setting]
+
+    def set(self, setting, percent):
+        self.levels[setting] = percent
+        self.writes.append((setting, percent))
+
+
+def create_backend(name=None):
+    """ SYSTEM_CONTROL_BACKEND=windows|linux|fake; defaults to the current platform. """
+    name = name or os.getenv("SYSTEM_CONTROL_BACKEND") or ("windows" if platform.system() == "Windows" else "linux")
+    backends = {"windows": WindowsBackend, "linux": LinuxBackend, "fake": FakeBackend}
+    if name not in backends:
+        raise ValueError(f"Unknown SYSTEM_CONTROL_BACKEND '{name}'. Use one of: {', '.join(backends)}.")
+    return backends[name]()
+
+
+def target_level(setting, current, value, step=STEP):
+    """
+    Level requested by `value` ("increase", "decrease", "80%", "80") given the current level.
+    Raises ValueError with a user-facing message for invalid input.
+    """
+    label = setting.capitalize()
+    if not isinstance(value, str):
+        raise ValueError(f"Error: Value must be a string specifying {setting} level or action "
+                         f"(e.g., 'increase', 'decrease', or an exact {setting} percentage).")
+    if "increase" in value.lower():
+        return min(current + step, 100), f"{label} increased to {{}}%"
+    if "decrease" in value.lower():
+        return max(current - step, 0), f"{label} decreased to {{}}%"
+    digits = re.sub(r"[^0-9]", "", value)
+    if not digits:
+        raise ValueError(f"Could not understand the {setting} value '{value}'.")
+    percent = int(digits)
+    if not 0 <= percent <= 100:
+        raise ValueError(f"{label} value must be between 0 and 100.")
+    return percent, f"{label} set to {{}}%"
+
+
+class SystemController:
+    def __init__(self, backend, step=STEP, debounce=DEBOUNCE):
+        self.backend = backend
+        self.step = step
+        self.debounce = debounce
+        self.commands = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="system-control", daemon=True)
+        self.thread.start()
+
+    def submit(self, setting, value):
+        """
+        Queue one command without waiting: returns a Future of its message. Commands submitted
+        back to back are applied as one burst. Raises ValueError for an invalid setting; an
+        invalid value fails the Future with ValueError.
+        """
+        setting = setting.lower()
+        if setting not in SETTINGS:
+            raise ValueError("Invalid setting type. Please use 'volume' or 'brightness'.")
+        future = Future()
+        self.commands.put((setting, value, future))
+        return future
+
+    def adjust(self, setting, value, timeout=5):
+        """
+        Apply one command and return a message such as "Volume set to 80%" once the level has
+        been written. Raises ValueError for invalid settings or values.
+        """
+        return self.submit(setting, value).result(timeout=timeout)
+
+    def _run(self):
+        try:
+            self.backend.open()
+        except Exception as e:
+            print(f"System control backend '{self.backend.name}' failed to open: {e}")
+
+        while True:
+            batch = [self.commands.get()]
+            while True:
+                try:
+                    batch.append(self.commands.get(timeout=self.debounce))
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply(self, batch):
+        """ Fold a burst of commands into one write per setting, then resolve their futures. """
+        levels, changed, done = {}, {}, []     # Hardware is read once per setting per burst
+        for setting, value, future in batch:
+            try:
+                if setting not in levels:
+                    levels[setting] = self.backend.get(setting)
+                level, message = target_level(setting, levels[setting], value, self.step)
+                levels[setting] = level
+                changed[setting] = level
+                done.append((future, setting, message.format(level)))
+            except Exception as e:
+                future.set_exception(e if isinstance(e, ValueError) else RuntimeError(f"Error: {e}"))
+
+        failed = {}
+        for setting, level in changed.items():
+            try:
+                self.backend.set(setting, level)
+            except Exception as e:
+                failed[setting] = RuntimeError(f"Error: {e}")
+
+        for future, setting, message in done:
+            if setting in failed:
+                future.set_exception(failed[setting])
+            else:
+                future.set_result(message)
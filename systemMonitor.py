@@ -0,0 +1,150 @@
+"""
+Background system-metrics collector behind tools.system_check.
+
+Static hardware facts (platform.processor() may fork a subprocess on Linux) are read once, on
+the monitor thread as soon as it starts, so system_check does not pay for them. The thread then
+samples CPU, memory, disk, battery and this process every SAMPLE_INTERVAL seconds into a
+fixed-size ring buffer, so a report is assembled instantly and can describe trends such as
+"CPU has been above 85% for the last minute".
+"""
+import os
+import platform
+import shutil
+import threading
+import time
+from collections import deque, namedtuple
+
+import psutil
+
+SAMPLE_INTERVAL = 2.0       # Seconds between samples
+HISTORY_SECONDS = 600       # How much history the ring buffer holds
+TREND_WINDOW = 60           # Seconds of history summarised in a report
+HIGH_USAGE = 85             # Percent at which CPU / memory / disk usage is called out
+
+Sample = namedtuple("Sample", ["at", "cpu", "memory", "disk", "battery", "plugged", "process_cpu", "process_rss_mb"])
+
+GB = 1024 ** 3
+
+
+class SystemMonitor:
+    def __init__(self, interval=SAMPLE_INTERVAL, history=HISTORY_SECONDS, disk_path=os.path.abspath(os.sep)):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.samples = deque(maxlen=max(2, int(history / interval)))
+        self.process = psutil.Process()
+        self.static = None
+        self.last_disk = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def static_facts(self):
+        """ Hardware and OS facts that never change while we run; the monitor thread computes them at start. """
+        if self.static is None:
+            self.static = {
+                "System": platform.system(),
+                "Node Name": platform.node(),
+                "Release": platform.release(),
+                "Version": platform.version(),
+                "Machine": platform.machine(),
+                "Processor": platform.processor(),
+                "Architecture": platform.architecture()[0],
+                "CPU Cores": psutil.cpu_count(logical=False),
+                "Logical Processors": psutil.cpu_count(logical=True),
+                "RAM Size (GB)": round(psutil.virtual_memory().total / GB, 2),
+            }
+        return self.static
+
+    def sample(self):
+        """ Take one reading and append it to the ring buffer. """
+        battery = psutil.sensors_battery()
+        with self.process.oneshot():
+            process_cpu = self.process.cpu_percent(interval=None)
+            process_rss = self.process.memory_info().rss
+        disk = shutil.disk_usage(self.disk_path)
+        reading = Sample(
+            at=time.monotonic(),
+            cpu=psutil.cpu_percent(interval=None),
+            memory=psutil.virtual_memory().percent,
+            disk=round(disk.used / disk.total * 100, 1),
+            battery=battery.percent if battery else None,
+            plugged=battery.power_plugged if battery else None,
+            process_cpu=process_cpu,
+            process_rss_mb=round(process_rss / 1024 ** 2, 1),
+        )
+        with self.lock:
+            self.samples.append(reading)
+            self.last_disk = disk
+        return reading
+
+    def start(self):
+        if self.thread is None:
+            # Prime the cpu_percent counters so the first real sample is meaningful
+            psutil.cpu_percent(interval=None)
+            self.process.cpu_percent(interval=None)
+            self.thread = threading.Thread(target=self._run, name="system-monitor", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        try:
+            self.static_facts()
+        except Exception as e:
+            print(f"System monitor could not read hardware facts: {e}")
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"System monitor sample failed: {e}")
+            time.sleep(self.interval)
+
+    def window(self, seconds=TREND_WINDOW):
+        """ Samples from the last `seconds`, oldest first. """
+        with self.lock:
+            samples = list(self.samples)
+        cutoff = time.monotonic() - seconds
+        return [s for s in samples if s.at >= cutoff]
+
+    def trends(self, seconds=TREND_WINDOW):
+        """ Plain-language observations about the last `seconds` of samples. """
+        samples = self.window(seconds)
+        if len(samples) < 2:
+            return []
+        span = samples[-1].at - samples[0].at
+        period = "the last minute" if 45 <= span <= 75 else f"the last {max(1, round(span))} seconds"
+        notes = []
+        for field, label in (("cpu", "CPU"), ("memory", "Memory")):
+            values = [getattr(s, field) for s in samples]
+            if min(values) >= HIGH_USAGE:
+                notes.append(f"{label} has been above {HIGH_USAGE}% for {period}.")
+            else:
+                notes.append(f"{label} averaged {sum(values) / len(values):.0f}% over {period} "
+                             f"(peak {max(values):.0f}%).")
+        rise = samples[-1].process_rss_mb - samples[0].process_rss_mb
+        if rise > 100:
+            notes.append(f"The assistant's memory grew by {rise:.0f} MB over {period}.")
+        return notes
+
+    def report(self):
+        """ Static facts, the latest sample and recent trends in the shape system_check returns. """
+        with self.lock:
+            latest = self.samples[-1] if self.samples else None
+        if latest is None:
+            latest = self.sample()
+        disk = self.last_disk
+
+        if latest.battery is None:
+            battery = "Battery information not available"
+        else:
+            battery = f"{latest.battery}% ({'Charging' if latest.plugged else 'Not Charging'})"
+
+        return dict(self.static_facts(), **{
+            "Disk Space": {
+                "Total (GB)": round(disk.total / GB, 2),
+                "Used (GB)": round(disk.used / GB, 2),
+                "Free (GB)": round(disk.free / GB, 2)
+            },
+            "Battery Status": battery,
+            "CPU Usage (%)": latest.cpu,
+            "Memory Usage (%)": latest.memory,
+            "Assistant Process": {"CPU (%)": latest.process_cpu, "Memory (MB)": latest.process_rss_mb},
+            "Trends": self.trends(),
+        })
@@ -0,0 +1,140 @@
+"""
+Tool schemas for the router LLM, generated from the functions in function_map.
+
+Each tool's JSON schema comes from its signature and docstring: the first paragraph is the
+description, and lines under "Parameters:" of the form `name (str): description` describe the
+arguments ("One of: a, b." at the end becomes an enum). Tools that are not in function_map
+cannot be offered, so the router can no longer pick something that does not exist.
+
+Per query only the tools relevant to the matched intent categories are sent, which keeps the
+router prompt to a few hundred tokens instead of a description of every tool. Categories that
+match almost any sentence ("what", "do", "run" ...) say nothing about the tool, so a query
+with only those gets every tool.
+"""
+import inspect
+import json
+import re
+
+NO_TOOL_REPLY = "no tool required"
+
+# Tools offered for each detectIntent.TOOL_KEYWORDS category
+INTENT_TOOLS = {
+    "communication": ["send_message", "whatsapp_call", "get_message_status"],
+    "reminder": ["set_reminder"],
+    "alarm": ["set_alarm", "whatsapp_call"],     # "ring Mummy" is a call
+    "weather": ["get_weather", "get_forecast"],
+    "time": ["get_time"],
+    "search": ["search_web", "system_check"],
+    "open": ["open_system_app"],
+    "music": ["play_music"],
+    "task": ["control_system", "set_alarm", "set_reminder"],
+    "note": ["set_reminder"],
+    "question": ["search_web", "get_time", "get_weather"],
+    "settings": ["control_system", "open_system_app"],
+}
+
+# Categories whose keywords are too common to narrow the tool set on their own
+GENERIC_INTENTS = {"question", "task", "open", "search", "settings"}
+
+_PARAM_LINE = re.compile(r"^(\w+)\s*\((\w+)\):\s*(.*)$")
+_ONE_OF = re.compile(r"\s*One of: ([^.]+)\.\s*$")
+_JSON_TYPES = {"str": "string", "int": "integer", "float": "number", "bool": "boolean"}
+
+
+def _parse_docstring(doc):
+    """ (first paragraph, {param: (type, description)}) from a tools.py docstring. """
+    lines = [line.strip() for line in (doc or "").splitlines()]
+    blank = lines.index("") if "" in lines else len(lines)
+    description = " ".join(line for line in lines[:blank] if line != "Parameters:")
+
+    params, current = {}, None
+    start = lines.index("Parameters:") + 1 if "Parameters:" in lines else len(lines)
+    for line in lines[start:]:
+        match = _PARAM_LINE.match(line)
+        if match:
+            current = match.group(1)
+            params[current] = [match.group(2), match.group(3)]
+        elif line and current:
+            params[current][1] += " " + line    # Continuation of a wrapped description
+        else:
+            break
+    return description, {name: tuple(value) for name, value in params.items()}
+
+
+def build_schema(name, function):
+    """ OpenAI/Groq function-calling schema for one tool. """
+    description, documented = _parse_docstring(inspect.getdoc(function))
+    properties, required = {}, []
+    for param in inspect.signature(function).parameters.values():
+        type_name, text = documented.get(param.name, ("str", ""))
+        prop = {"type": _JSON_TYPES.get(type_name, "string")}
+        one_of = _ONE_OF.search(text)
+        if one_of:
+            prop["enum"] = [choice.strip() for choice in one_of.group(1).split(",")]
+            text = text[:one_of.start()]
+        if text:
+            prop["description"] = text
+        properties[param.name] = prop
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description or name.replace("_", " "),
+            "parameters": {"type": "object", "properties": properties, "required": required},
+        },
+    }
+
+
+class ToolRegistry:
+    def __init__(self, functions, intent_tools=INTENT_TOOLS):
+        self.functions = functions
+        self.schemas = {name: build_schema(name, function) for name, function in functions.items()}
+        # Drop entries for tools that are not in function_map
+        self.intent_tools = {intent: [t for t in tools if t in functions] for intent, tools in intent_tools.items()}
+
+    def relevant(self, labels):
+        """
+        Tool names for intent categories and/or tool names (the embedding backend labels queries
+        with tool names), widened to every tool sharing a category with a named tool. All tools
+        when nothing specific is known: no labels, or only GENERIC_INTENTS categories.
+        """
+        if all(label in GENERIC_INTENTS for label in labels):
+            return list(self.functions)
+        names = []
+        for label in labels:
+            if label in self.intent_tools:
+                names += self.intent_tools[label]
+            elif label in self.functions:
+                names.append(label)
+                names += [t for tools in self.intent_tools.values() if label in tools for t in tools]
+        names = list(dict.fromkeys(names))
+        return names or list(self.functions)
+
+    def tools_for(self, labels):
+        """ Schemas to pass as `tools=` for a query with the given intent labels. """
+        return [self.schemas[name] for name in self.relevant(labels)]
+
+    def render_call(self, name, arguments):
+        """
+        Turn a native tool call (name plus JSON arguments) into the call string the dispatcher
+        parses, e.g. control_system("volume", "80%"). Arguments are put in signature order.
+        """
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments or "{}")
+        function = self.functions.get(name)
+        order = list(inspect.signature(function).parameters) if function else list(arguments)
+        values = [arguments[p] for p in order if p in arguments]
+        return f"{name}(" + ", ".join(json.dumps(str(value)) for value in values) + ")"
+
+    def rules_out_tools(self, text):
+        """
+        True once a streamed text reply can only be "no tool required": it is a prefix of that
+        phrase (or starts with it) and no tool name starts the same way. "no" alone is not
+        enough ("Now", "Noted, set_alarm(...)"), so at least "no t" must have arrived.
+        """
+        reply = text.lstrip().lstrip("\"'`").lower()
+        if len(reply) < len("no t") or not (NO_TOOL_REPLY.startswith(reply) or reply.startswith(NO_TOOL_REPLY)):
+            return False
+        return not any(name.startswith(reply[:len(name)]) for name in self.functions)
@@ -1,29 +1,24 @@
 # ================================
 # Imports
 # ================================
-import requests
 import json
-from datetime import datetime
-import psutil
+from datetime import datetime, timedelta
 import threading
+from concurrent.futures import Future
 import dateparser
-import time
 from playsound import playsound
 import pywhatkit as kit
-import urllib.parse
-import pyautogui
 import os
 import subprocess
-import shutil
 import platform
 import re
-from comtypes import CLSCTX_ALL
-import screen_brightness_control as sbc  # For brightness control
 from dotenv import load_dotenv
-
-# For volume control
-from ctypes import cast, POINTER
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+from forecastStore import ForecastStore
+from scheduler import TimerScheduler
+from scheduleStore import ScheduleStore, SCHEDULE_DB
+from systemMonitor import SystemMonitor
+from outbox import Outbox, create_transport
+from systemControl import SystemController, create_backend
 import pygame
 
 # ================================
@@ -32,6 +27,21 @@ import pygame
 
 load_dotenv()
 
+forecast_store = ForecastStore(api_key=os.getenv("WEATHER_API_KEY"))
+
+# Samples CPU/memory/disk/battery in the background so system_check answers instantly
+system_monitor = SystemMonitor()
+
+# One thread and one heap for every alarm and reminder (see scheduler.py), journaled to disk
+# so pending alarms survive a restart
+scheduler = TimerScheduler(store=ScheduleStore(SCHEDULE_DB))
+
+# Messages and calls are delivered by a background outbox (OUTBOX_TRANSPORT=whatsapp|log)
+outbox = Outbox(create_transport())
+
+# Volume/brightness backend for this platform (SYSTEM_CONTROL_BACKEND=windows|linux|fake)
+system_controller = SystemController(create_backend())
+
 contacts = {
         "Anil": "+917439932452",
         "Mummy": "+913784567273",
@@ -40,72 +50,68 @@ contacts = {
 
 
 def system_check():
-    info = {
-        "System": platform.system(),
-        "Node Name": platform.node(),
-        "Release": platform.release(),
-        "Version": platform.version(),
-        "Machine": platform.machine(),
-        "Processor": platform.processor(),
-        "Architecture": platform.architecture()[0],
-        "CPU Cores": psutil.cpu_count(logical=False),
-        "Logical Processors": psutil.cpu_count(logical=True),
-        "RAM Size (GB)": round(psutil.virtual_memory().total / (1024 ** 3), 2),
-        "Disk Space": {
-            "Total (GB)": round(shutil.disk_usage('/').total / (1024 ** 3), 2),
-            "Used (GB)": round(shutil.disk_usage('/').used / (1024 ** 3), 2),
-            "Free (GB)": round(shutil.disk_usage('/').free / (1024 ** 3), 2)
-        },
-        "Battery Status": get_battery_info()
-    }
-    return json.dumps(info, indent=4)
+    """ Run a system diagnostic: hardware, CPU, memory, disk and battery usage and recent trends. """
+    return json.dumps(system_monitor.report(), indent=4)
 
-def get_battery_info():
-    battery = psutil.sensors_battery()
-    if battery is None:
-        return "Battery information not available"
-    return f"{battery.percent}% ({'Charging' if battery.power_plugged else 'Not Charging'})"
 
+ALARM_SOUND = "sounds/alarm.mp3"
+_mixer_lock = threading.Lock()
 
-def alarm_thread(text):
-    sound_file = "sounds/alarm.mp3"
 
-    pygame.init()
+def ring_alarm(item):
+    """ Scheduler handler for alarms: start the alarm sound and return while it plays. """
+    with _mixer_lock:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+    print(f"Wake up! Alarm ringing! ({item.message})")
+    pygame.mixer.music.load(ALARM_SOUND)
+    pygame.mixer.music.play()
 
-    try:
-        # Extract time using dateparser
-        alarm_time = dateparser.parse(text, settings={'PREFER_DATES_FROM': 'future'})
-
-        if alarm_time is None:
-            print("Could not extract a valid time. Please try again.")
-            return
-
-        print(f"Alarm set for {alarm_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        while True:
-            now = datetime.now()
-            if now >= alarm_time:
-                print("Wake up! Alarm ringing!")
-                pygame.mixer.music.load("sounds/alarm.mp3")
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                break
-            time.sleep(1)
-    except Exception as e:
-        print(f"An error occurred in alarm_thread: {e}")
+
+def announce_reminder(item):
+    """ Default reminder handler; main replaces it with one that speaks the reminder. """
+    print(f"⏰ Reminder: {item.message}")
+
+
+def parse_when(text):
+    # Extract time using dateparser
+    return dateparser.parse(text, settings={'PREFER_DATES_FROM': 'future'})
+
+
+def spoken_when(when, now=None):
+    """ "07:00 AM", "07:00 AM tomorrow" or "07:00 AM on Sunday, July 18, 2027" for confirmations. """
+    now = now or datetime.now()
+    days = (when.date() - now.date()).days
+    if days == 0:
+        return when.strftime('%I:%M %p')
+    if days == 1:
+        return when.strftime('%I:%M %p tomorrow')
+    if when.year != now.year:
+        return when.strftime('%I:%M %p on %A, %B %d, %Y')
+    return when.strftime('%I:%M %p on %A, %B %d')
 
 
 def set_alarm(text):
-    # Run the alarm in a background thread so it doesn't block the main thread.
-    thread = threading.Thread(target=alarm_thread, args=(text,), daemon=True)
-    thread.start()
-    return "Alarm is set"
+    """
+    Set an alarm.
+
+    Parameters:
+        text (str): When the alarm should ring, as said by the user, e.g. "7 AM" or "06:30".
+    """
+    alarm_time = parse_when(text)
+    if alarm_time is None:
+        return "Could not extract a valid time. Please try again."
+
+    scheduler.schedule("alarm", alarm_time, "Wake up!")
+    print(f"Alarm set for {alarm_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    return f"Alarm is set for {spoken_when(alarm_time)}"
 
 
 def get_weather():
-    city = 'Bangalore'
     """
-    Retrieves current weather data and returns a JSON-formatted string containing:
+    Current weather conditions.
+
+    Returns a JSON-formatted string containing:
         - current_temperature_celsius: current temperature in Celsius
         - humidity_percent: humidity in percent
         - wind_speed_kmph: wind speed in kilometers per hour
@@ -113,211 +119,266 @@ def get_weather():
         - cloudiness_percent: cloudiness in percentage
         - current_time: local current time in 12-hour format (HH:MM AM/PM)
         - chance_of_rain_percent: chance of rain in percentage (using the forecast's 'pop' value)
-
-    Parameters:
-        city (str): Name of the city for which weather data is fetched.
-
-    Returns:
-        A JSON-formatted string with the above weather details.
     """
-    # Embedded API key
-    api_key = os.getenv("WEATHER_API_KEY")
-
-    # Use the forecast endpoint to get weather data
+    city = 'Bangalore'
     try:
-        response = requests.get(f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={api_key}")
-        response.raise_for_status()
+        forecast = forecast_store.get(city)
     except Exception as e:
         return json.dumps({"error": str(e)})
 
-    data = response.json()
-
-    # Use the first forecast entry as a proxy for current conditions
-    if "list" in data and len(data["list"]) > 0:
-        current_forecast = data["list"][0]
-    else:
+    if not len(forecast):
         return json.dumps({"error": "No forecast data available."})
 
-    # Extract weather details
-    temp_k = current_forecast["main"]["temp"]
-    temp_c = round(temp_k - 273.15, 2)
-    humidity = current_forecast["main"]["humidity"]
-    wind_speed_mps = current_forecast["wind"]["speed"]
-    wind_speed_kmph = round(wind_speed_mps * 3.6, 2)
-    cloudiness = current_forecast["clouds"]["all"]
-
-    # Probability of Precipitation (pop) is given as a fraction; convert it to percentage
-    pop = current_forecast.get("pop", 0)
-    chance_of_rain_percent = round(pop * 100, 2)
-
-    # For this example, we'll assume precipitation percentage is the same as the chance of rain
-    precipitation_percent = chance_of_rain_percent
-
-    # Get current local time in 12-hour format
+    # Use the forecast slot covering the current time as a proxy for current conditions
     now = datetime.now()
-    current_time = now.strftime("%I:%M %p")
+    current_forecast = forecast.at(now)
 
     result = {
-        "current_temperature_celsius": temp_c,
-        "humidity_percent": humidity,
-        "wind_speed_kmph": wind_speed_kmph,
-        "precipitation_percent": precipitation_percent,
-        "cloudiness_percent": cloudiness,
-        "current_time": current_time,
-        "chance_of_rain_percent": chance_of_rain_percent
+        "current_temperature_celsius": current_forecast["temperature_celsius"],
+        "humidity_percent": current_forecast["humidity_percent"],
+        "wind_speed_kmph": current_forecast["wind_speed_kmph"],
+        # For this example, we'll assume precipitation percentage is the same as the chance of rain
+        "precipitation_percent": current_forecast["chance_of_rain_percent"],
+        "cloudiness_percent": current_forecast["cloudiness_percent"],
+        "current_time": now.strftime("%I:%M %p"),
+        "chance_of_rain_percent": current_forecast["chance_of_rain_percent"]
     }
 
     return json.dumps(result, indent=4)
 
 
+# Hour ranges used for "tomorrow evening", "this morning", ...
+DAY_PARTS = {"tonight": (18, 24), "morning": (6, 12), "afternoon": (12, 17), "evening": (17, 21), "night": (21, 24)}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def forecast_window(when, now=None):
+    """
+    Turn phrases like "tomorrow evening", "the weekend", "friday" or "tonight" into a
+    (start, end) datetime range. Returns None if the phrase cannot be understood.
+    """
+    now = now or datetime.now()
+    words = set(re.findall(r"[a-z]+", when.lower()))
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if "weekend" in words:
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if today.weekday() == 6:
+            saturday = today - timedelta(days=1)
+        return max(saturday, now), saturday + timedelta(days=2)
+
+    day = None
+    if "tomorrow" in words:
+        day = today + timedelta(days=1)
+    elif words & {"today", "tonight", "now"}:
+        day = today
+    else:
+        for index, name in enumerate(WEEKDAYS):
+            if name in words:
+                day = today + timedelta(days=(index - today.weekday()) % 7)
+                break
+
+    part = next((p for p in DAY_PARTS if p in words), None)
+    if day is None and part is not None:
+        day = today
+    if day is None:
+        parsed = dateparser.parse(when, settings={'PREFER_DATES_FROM': 'future'})
+        if parsed is None:
+            return None
+        if parsed.hour or parsed.minute:
+            return parsed, parsed + timedelta(hours=3)
+        day = parsed.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if part is not None:
+        first_hour, last_hour = DAY_PARTS[part]
+        start, end = day + timedelta(hours=first_hour), day + timedelta(hours=last_hour)
+    else:
+        start, end = day, day + timedelta(days=1)
+
+    # Don't report on the part of today that has already passed
+    if start < now < end:
+        start = now
+    return start, end
+
+
+def get_forecast(when):
+    """
+    Forecast summary for a time range such as "tomorrow evening", "the weekend" or "friday":
+    temperature range, chance of rain, whether it will rain and the expected conditions.
+
+    Parameters:
+        when (str): The time phrase from the query, e.g. "tomorrow evening" or "weekend".
+    """
+    city = 'Bangalore'
+    window = forecast_window(when)
+    if window is None:
+        return json.dumps({"error": f"Could not understand when '{when}' is."})
+
+    try:
+        forecast = forecast_store.get(city)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+    summary = forecast.summary(*window)
+    if summary is None:
+        return json.dumps({"error": "The forecast only covers the next five days."})
+    return json.dumps(dict(summary, city=city, when=when), indent=4)
+
+
 def whatsapp_call(name, type):
+    """
+    Start a WhatsApp call with a contact.
+
+    Parameters:
+        name (str): Contact name, e.g. "Priya".
+        type (str): Kind of call. One of: voice, video.
+    """
     call_type = type
     number = contacts.get(name)
     if not number:
-        print(f"Contact '{name}' not found.")
-        return
+        return f"Contact '{name}' not found."
 
     if call_type not in ["voice", "video"]:
-        print("Invalid call type. Choose either 'voice' or 'video'.")
-        return
+        return "Invalid call type. Choose either 'voice' or 'video'."
 
-    try:
-        print(f"Placing a {call_type} call to {name}...")
-
-        # Form the WhatsApp call URL based on call type
-        if call_type == "voice":
-            url = f"whatsapp://call?phone={number}"
-        else:
-            url = f"whatsapp://video?phone={number}"
-
-        # Open the URL using subprocess
-        subprocess.run(["start", url], shell=True)
-    except Exception as e:
-        print(f"Error: {e}")
+    print(f"Placing a {call_type} call to {name}...")
+    outbox.call(name, number, call_type)
+    return f"Placing a {call_type} call to {name}"
 
 
 def send_message(name, message):
-    # Example contact list
+    """
+    Send a WhatsApp text message to a contact.
 
+    Parameters:
+        name (str): Contact name, e.g. "Anil".
+        message (str): The message text, without the recipient, e.g. "I will be late today".
+    """
     # Check if name exists in the contacts
     number = contacts.get(name)
     if not number:
-        print(f"Contact '{name}' not found.")
-        return
+        return f"Contact '{name}' not found."
 
-    try:
-        print(f"Opening WhatsApp Desktop to text {name}...")
-        # Encode the message for URL compatibility
-        encoded_message = urllib.parse.quote(message)
-        subprocess.run(["start", f"whatsapp://send?phone={number}"], shell=True)
-
-        time.sleep(2)
-        # Construct the WhatsApp URL
-        url = f'whatsapp://send?phone={number}&text={encoded_message}'
-
-        # Open WhatsApp using os.startfile (Windows only)
-        os.startfile(url)
-        print("Opening WhatsApp...")
-
-        # Simulate Enter key press to send the message
-        time.sleep(1)  # Adjust if needed
-        print("Sending the message...")
-        pyautogui.press('enter')
-        return "Message sent"
-    except Exception as e:
-        print(f"Error: {e}")
+    # Delivery happens on the outbox thread; this returns as soon as the message is queued
+    item = outbox.send_message(name, number, message)
+    print(f"Queued message {item.id} to {name}")
+    return f"Message to {name} queued"
+
+
+def get_message_status(name):
+    """
+    Delivery status of the most recent message or call to a contact.
+
+    Parameters:
+        name (str): Contact name.
+    """
+    history = outbox.history(name)
+    if not history:
+        return f"No messages or calls to {name} yet."
+    latest = history[0]
+    what = "message" if latest["kind"] == "message" else f"{latest['kind']} call"
+    if latest["status"] == "failed":
+        return f"The {what} to {latest['to']} failed: {latest['error']}"
+    return f"The {what} to {latest['to']} is {latest['status']}"
 
 
 def get_time():
+    """ The current local time. """
     now = datetime.now()
     hours = now.hour % 12 or 12  # Convert to 12-hour format
     minutes = now.minute
     am_pm = "AM" if now.hour < 12 else "PM"
-    return f"{hours}:{minutes} {am_pm}"
+    return f"{hours}:{minutes:02d} {am_pm}"
 
 
 
 def search_web(query):
+    """
+    Search the web for real-time information or current events.
+
+    Parameters:
+        query (str): Search terms, e.g. "latest update on Mars colonization".
+    """
     print(f"Searching the web for: {query}")
 
 
 def set_reminder(message, datetime):
-    print(f"Reminder set: '{message}' at {datetime}")
+    """
+    Set a reminder that is spoken at the given time.
+
+    Parameters:
+        message (str): What to say when it is due, e.g. "You were supposed to call your mom now.".
+        datetime (str): When, as said by the user, e.g. "6 PM" or "evening".
+    """
+    remind_at = parse_when(datetime)
+    if remind_at is None:
+        return "Could not extract a valid time. Please try again."
+
+    scheduler.schedule("reminder", remind_at, message)
+    print(f"Reminder set: '{message}' at {remind_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    return f"Reminder is set for {spoken_when(remind_at)}"
 
 
 def play_music(song_name):
+    """
+    Play a song on YouTube.
+
+    Parameters:
+        song_name (str): Song title, e.g. "Bohemian Rhapsody".
+    """
     try:
         print(f"Searching and playing '{song_name}' on YouTube...")
         kit.playonyt(song_name)
         print("Video is now playing.")
+        return f"Playing {song_name}"
     except Exception as e:
         print(f"An error occurred: {e}")
+        return f"Couldn't play {song_name}"
 
 def control_system(setting_type, value):
+    """
+    Change the speaker volume or screen brightness.
+
+    Parameters:
+        setting_type (str): Which setting. One of: volume, brightness.
+        value (str): "increase", "decrease" or a percentage such as "80%" ("full" is "100%").
+    """
     try:
-        if setting_type.lower() == "volume":
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            volume = cast(interface, POINTER(IAudioEndpointVolume))
-            try:
-                current_volume = volume.GetMasterVolumeLevelScalar() * 100  # Get current volume in percentage
-                if isinstance(value, str):
-                    # Check if it's an increase or decrease command
-                    if "increase" in value.lower():
-                        new_volume = min(current_volume + 20, 100)
-                        volume.SetMasterVolumeLevelScalar(new_volume / 100.0, None)
-                        print(f"Volume increased to {new_volume}%")
-                    elif "decrease" in value.lower():
-                        new_volume = max(current_volume - 20, 0)
-                        volume.SetMasterVolumeLevelScalar(new_volume / 100.0, None)
-                        print(f"Volume decreased to {new_volume}%")
-                    else:
-                        # Extract volume percentage from the input string
-                        volume_percentage = int(re.sub(r"[^0-9]", "", value))
-                        if 0 <= volume_percentage <= 100:
-                            volume.SetMasterVolumeLevelScalar(volume_percentage / 100.0, None)
-                            print(f"Volume set to {volume_percentage}%")
-                        else:
-                            print("Volume value must be between 0 and 100.")
-                else:
-                    print("Error: Value must be a string specifying volume level or action (e.g., 'increase', 'decrease', or an exact volume percentage).")
-            finally:
-                # Explicitly release the COM object to prevent access violation errors during garbage collection.
-                if volume is not None:
-                    volume.Release()
-
-        elif setting_type.lower() == "brightness":
-            current_brightness = sbc.get_brightness()[0]  # Assuming a single monitor
-            if isinstance(value, str):
-                # Check if it's an increase or decrease command
-                if "increase" in value.lower():
-                    new_brightness = min(current_brightness + 20, 100)
-                    sbc.set_brightness(new_brightness)
-                    print(f"Brightness increased to {new_brightness}%")
-                elif "decrease" in value.lower():
-                    new_brightness = max(current_brightness - 20, 0)
-                    sbc.set_brightness(new_brightness)
-                    print(f"Brightness decreased to {new_brightness}%")
-                else:
-                    # Extract brightness percentage from the input string
-                    brightness_percentage = int(re.sub(r"[^0-9]", "", value))
-                    if 0 <= brightness_percentage <= 100:
-                        sbc.set_brightness(brightness_percentage)
-                        print(f"Brightness set to {brightness_percentage}%")
-                    else:
-                        print("Brightness value must be between 0 and 100.")
-            else:
-                print("Error: Value must be a string specifying brightness level or action (e.g., 'increase', 'decrease', or an exact brightness percentage).")
-        else:
-            print("Invalid setting type. Please use 'volume' or 'brightness'.")
+        return system_controller.adjust(setting_type, value)
     except Exception as e:
-        print(f"Error: {e}")
+        return str(e)
+
+
+def start_control_system(setting_type, value):
+    """
+    Non-blocking control_system: queues the command and returns a Future of the same message,
+    so several calls made back to back are written to the hardware as one burst.
+    """
+    result = Future()
+
+    def finish(future):
+        if not result.cancelled():
+            error = future.exception()
+            result.set_result(str(error) if error else future.result())
+
+    try:
+        system_controller.submit(setting_type, value).add_done_callback(finish)
+    except Exception as e:
+        result.set_result(str(e))
+    return result
 
 
 def open_system_app(app_name):
+    """
+    Open a system application.
+
+    Parameters:
+        app_name (str): The application. One of: terminal, task manager, notepad, explorer,
+            control panel, settings, calculator, wifi, bluetooth, diskmgmt, camera.
+    """
     if platform.system() != "Windows":
         print("This function is only for Windows.")
-        return
+        return "Opening apps is only supported on Windows."
 
     apps = {
         "terminal": ["start", "cmd"],  # Replaced powershell with wt (Windows Terminal)
@@ -340,10 +401,20 @@ def open_system_app(app_name):
             # Use shell=True to handle file associations and UWP apps properly
             subprocess.run(command, check=True, shell=True)
             print(f"Successfully launched {app_name}.")
+            return f"Opening {app_name}"
         except subprocess.CalledProcessError as e:
             print(f"Failed to launch {app_name}. Error: {e}")
+            return f"Failed to launch {app_name}"
         except Exception as e:
             print(f"Unexpected error opening {app_name}: {e}")
+            return f"Failed to launch {app_name}"
     else:
         print(f"Application '{app_name}' is not recognized.")
+        return f"Application '{app_name}' is not recognized"
+
 
+scheduler.on("alarm", ring_alarm)
+scheduler.on("reminder", announce_reminder)
+# The scheduler is restored and started by the entry point once it has registered its own
+# handlers; items that came due while the process was down fire straight away on restore().
+system_monitor.start()
@@ -0,0 +1,116 @@
+"""
+Persistent cache of synthesized speech.
+
+Greetings and short confirmations are spoken again and again, so their audio is stored on disk
+as float32 .npy files named by a SHA-1 of (text, voice, speed, lang). Hits are opened with
+numpy's mmap_mode and handed to the audio output without being read into memory first. Files
+are evicted least-recently-used first once the cache grows past max_bytes; a file's mtime
+records its last use, so the LRU order survives restarts.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_DIR = os.path.join(".cache", "tts")
+MAX_BYTES = 64 * 1024 * 1024    # ~11 minutes of 24 kHz float32 audio
+MAX_TEXT_CHARS = 80             # Longer text is almost never repeated word for word
+
+
+def cache_key(text, voice, speed, lang):
+    raw = json.dumps([" ".join(text.split()), voice, round(float(speed), 3), lang])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, max_text_chars=MAX_TEXT_CHARS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_text_chars = max_text_chars
+        self.index = OrderedDict()      # key -> size in bytes, least recently used first
+        self.total = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".npy"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+            elif name.endswith(".tmp"):
+                os.remove(path)     # Left over from an interrupted write
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+            self.total += size
+
+    def cacheable(self, text):
+        return 0 < len(text) <= self.max_text_chars
+
+    def get(self, text, voice, speed, lang):
+        """ Memory-mapped float32 samples for the phrase, or None. """
+        key = cache_key(text, voice, speed, lang)
+        with self.lock:
+            if key not in self.index:
+                self.misses += 1
+                return None
+            self.index.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"TTS cache entry unreadable, dropping it: {e}")
+            self._drop(key)
+            return None
+
+    def put(self, text, voice, speed, lang, audio):
+        key = cache_key(text, voice, speed, lang)
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        path = self._path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, audio)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.total += size - self.index.pop(key, 0)
+            self.index[key] = size
+            self._evict()
+
+    def _evict(self):
+        while self.total > self.max_bytes and len(self.index) > 1:
+            key, size = self.index.popitem(last=False)
+            self.total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass    # Still mapped by a reader on Windows; the next scan will pick it up again
+
+    def _drop(self, key):
+        with self.lock:
+            self.total -= self.index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def has(self, text, voice, speed, lang):
+        """ Membership test that does not count as a use. """
+        return cache_key(text, voice, speed, lang) in self.index
+
+    def counters(self):
+        with self.lock:
+            return {"entries": len(self.index), "bytes": self.total, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,280 @@
+"""
+Streaming speech capture: microphone (or WAV file) -> VAD -> endpointer -> ASR backend.
+
+EnergyVAD classifies 30 ms frames from their energy and zero-crossing rate relative to a noise
+floor that keeps adapting, so a fan switching on does not leave it stuck in "speech". The
+Endpointer turns those decisions into utterances: a few speech frames open one (with some
+pre-roll so the first syllable is kept), and HANGOVER_MS of continuous silence closes it.
+Utterances go to an ASRBackend: GoogleASR (the online recognizer used so far) or VoskASR
+(offline, needs a model from https://alphacephei.com/vosk/models).
+
+    python voiceCapture.py recording.wav [--asr google|vosk]
+
+prints the utterances found in a WAV file, which is how the VAD settings are tuned.
+"""
+import argparse
+import json
+import os
+import wave
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+THRESHOLD_DB = 10       # How far above the noise floor a frame must be to count as speech
+MAX_ZCR = 0.35          # Zero-crossing rate above which quiet frames are treated as hiss
+START_FRAMES = 3        # Consecutive speech frames that open an utterance
+PRE_ROLL_MS = 300
+HANGOVER_MS = 600       # Silence that ends an utterance
+MIN_SPEECH_MS = 250     # Shorter bursts (clicks, coughs) are discarded
+MAX_UTTERANCE_S = 15
+
+Utterance = namedtuple("Utterance", ["samples", "start", "end"])   # int16 samples, seconds into the stream
+
+
+def frame_features(frame):
+    """ (energy in dBFS, zero-crossing rate) of an int16 frame. """
+    x = frame.astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(x * x))
+    zcr = np.count_nonzero(np.diff(np.signbit(x))) / max(1, len(x) - 1)
+    return 20 * np.log10(rms + 1e-10), zcr
+
+
+class EnergyVAD:
+    def __init__(self, threshold_db=THRESHOLD_DB, max_zcr=MAX_ZCR, adapt=0.05, speech_adapt=0.002):
+        self.threshold_db = threshold_db
+        self.max_zcr = max_zcr
+        self.adapt = adapt                  # Noise floor smoothing while silent
+        self.speech_adapt = speech_adapt    # Much slower drift while "speech", to escape steady noise
+        self.noise_db = None
+
+    def is_speech(self, frame):
+        energy_db, zcr = frame_features(frame)
+        if self.noise_db is None:
+            self.noise_db = energy_db
+        margin = energy_db - self.noise_db
+        # Loud frames are speech whatever their ZCR (fricatives); quieter ones must not look like hiss
+        speech = margin > self.threshold_db + 10 or (margin > self.threshold_db and zcr <= self.max_zcr)
+
+        if energy_db < self.noise_db:
+            self.noise_db += 0.3 * (energy_db - self.noise_db)      # Quieter room: follow quickly
+        else:
+            self.noise_db += (self.speech_adapt if speech else self.adapt) * (energy_db - self.noise_db)
+        return speech
+
+
+class Endpointer:
+    def __init__(self, vad=None, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, start_frames=START_FRAMES,
+                 pre_roll_ms=PRE_ROLL_MS, hangover_ms=HANGOVER_MS, min_speech_ms=MIN_SPEECH_MS,
+                 max_utterance_s=MAX_UTTERANCE_S):
+        self.vad = vad or EnergyVAD()
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.start_frames = start_frames
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+        self.frames = []            # Frames of the utterance in progress
+        self.speech_frames = 0
+        self.speech_run = 0
+        self.silence_run = 0
+        self.position = 0           # Frames seen so far
+        self.started_at = None
+
+    @property
+    def frame_length(self):
+        return self.sample_rate * self.frame_ms // 1000
+
+    def process(self, frame):
+        """ Feed one frame; returns an Utterance when one has just ended, otherwise None. """
+        speech = self.vad.is_speech(frame)
+        self.position += 1
+
+        if self.started_at is None:
+            self.pre_roll.append(frame)
+            self.speech_run = self.speech_run + 1 if speech else 0
+            if self.speech_run >= self.start_frames:
+                self.frames = list(self.pre_roll)
+                self.started_at = self.position - len(self.frames)
+                self.speech_frames = self.speech_run
+                self.silence_run = 0
+                self.pre_roll.clear()
+            return None
+
+        self.frames.append(frame)
+        if speech:
+            self.speech_frames += 1
+            self.silence_run = 0
+        else:
+            self.silence_run += 1
+        if self.silence_run >= self.hangover_frames or len(self.frames) >= self.max_frames:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """ End the utterance in progress (e.g. at the end of a file); None if there is none. """
+        if self.started_at is None:
+            return None
+        frames, start = self.frames, self.started_at
+        # Drop the trailing silence that closed the utterance
+        if self.silence_run:
+            frames = frames[:len(frames) - self.silence_run + self.hangover_frames // 3]
+        self.frames, self.started_at, self.speech_run, self.silence_run = [], None, 0, 0
+        if self.speech_frames < self.min_speech_frames:
+            return None
+        seconds = self.frame_ms / 1000
+        return Utterance(np.concatenate(frames), start * seconds, (start + len(frames)) * seconds)
+
+    def utterances(self, frames):
+        """ Yield utterances from an iterable of frames until it is exhausted. """
+        for frame in frames:
+            utterance = self.process(frame)
+            if utterance is not None:
+                yield utterance
+        utterance = self.flush()
+        if utterance is not None:
+            yield utterance
+
+
+# ------------------------------------------------------------------------------
+# Audio sources: iterables of int16 frames
+# ------------------------------------------------------------------------------
+
+class MicrophoneSource:
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS, device_index=None):
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+        self.device_index = device_index
+
+    def __iter__(self):
+        import pyaudio
+
+        p = pyaudio.PyAudio()
+        stream = p.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+                        frames_per_buffer=self.frame_length, input_device_index=self.device_index)
+        try:
+            while True:
+                data = stream.read(self.frame_length, exception_on_overflow=False)
+                yield np.frombuffer(data, dtype=np.int16)
+        finally:
+            stream.stop_stream()
+            stream.close()
+            p.terminate()
+
+
+class WavSource:
+    """ Frames from a 16-bit PCM WAV file, mixed to mono and resampled to sample_rate. """
+    def __init__(self, path, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.frame_length = sample_rate * frame_ms // 1000
+
+    def read(self):
+        with wave.open(self.path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported.")
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+        if rate != self.sample_rate:
+            positions = np.arange(0, len(samples), rate / self.sample_rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+        return samples
+
+    def __iter__(self):
+        samples = self.read()
+        usable = len(samples) - len(samples) % self.frame_length
+        for start in range(0, usable, self.frame_length):
+            yield samples[start:start + self.frame_length]
+
+
+# ------------------------------------------------------------------------------
+# Speech recognition backends
+# ------------------------------------------------------------------------------
+
+class ASRError(Exception):
+    """ The recognizer could not be reached or failed; the utterance is lost. """
+
+
+class ASRBackend(ABC):
+    name = "asr"
+
+    @abstractmethod
+    def transcribe(self, samples, sample_rate=SAMPLE_RATE):
+        """ Text for int16 samples, or "" if nothing intelligible was said. """
+
+
+class GoogleASR(ASRBackend):
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, samples, sample_rate=SAMPLE_RATE):
+        audio = self.sr.AudioData(samples.tobytes(), sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio)
+        except self.sr.UnknownValueError:
+            return ""
+        except self.sr.RequestError as e:
+            raise ASRError(f"Could not connect to Google's Speech API: {e}")
+
+
+class VoskASR(ASRBackend):
+    """ Offline recognition; VOSK_MODEL points at an unpacked model directory. """
+    name = "vosk"
+
+    def __init__(self, model_path=None):
+        import vosk
+        self.vosk = vosk
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path or os.getenv("VOSK_MODEL", "models/vosk"))
+
+    def transcribe(self, samples, sample_rate=SAMPLE_RATE):
+        recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(samples.tobytes())
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+def create_asr(name=None):
+    """ ASR_BACKEND=google|vosk; defaults to google. """
+    name = name or os.getenv("ASR_BACKEND", "google")
+    if name == "vosk":
+        return VoskASR()
+    return GoogleASR()
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    """ Save int16 samples, e.g. to keep utterances for tuning. """
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find (and optionally transcribe) utterances in a WAV file.")
+    parser.add_argument("wav")
+    parser.add_argument("--asr", choices=["google", "vosk"], help="Transcribe each utterance with this backend")
+    parser.add_argument("--threshold-db", type=float, default=THRESHOLD_DB)
+    parser.add_argument("--hangover-ms", type=int, default=HANGOVER_MS)
+    args = parser.parse_args()
+
+    endpointer = Endpointer(EnergyVAD(threshold_db=args.threshold_db), hangover_ms=args.hangover_ms)
+    asr = create_asr(args.asr) if args.asr else None
+    for utterance in endpointer.utterances(WavSource(args.wav)):
+        line = f"{utterance.start:7.2f}s - {utterance.end:7.2f}s"
+        if asr:
+            line += f"  {asr.transcribe(utterance.samples)!r}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
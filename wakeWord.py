@@ -0,0 +1,155 @@
+"""
+On-device wake-word spotting for "alita".
+
+While the assistant is asleep, every utterance used to be sent to the speech API just to look
+for the wake word. The spotter compares an utterance against a few enrolled recordings of the
+wake word instead: both are turned into MFCCs (numpy only), and a subsequence DTW finds the
+best alignment of each template anywhere in the first MAX_SEARCH_SECONDS of the utterance. The
+score is the mean per-frame distance along that alignment; lower means more alike.
+
+Templates are 16 kHz WAV files in data/wake_word/. Record them with
+
+    python wakeWord.py enroll --count 5
+
+and check live scores with `python wakeWord.py listen`. benchmarkWakeWord.py measures false
+accepts/rejects over recorded clips and suggests a threshold.
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from voiceCapture import SAMPLE_RATE, Endpointer, EnergyVAD, MicrophoneSource, WavSource, write_wav
+
+TEMPLATE_DIR = os.path.join("data", "wake_word")
+THRESHOLD = float(os.getenv("WAKE_THRESHOLD", "4.0"))    # Tune with benchmarkWakeWord.py
+MAX_SEARCH_SECONDS = 2.0    # The wake word starts the utterance ("alita, what's the time")
+
+N_FFT = 512
+WIN_MS = 25
+HOP_MS = 10
+N_MELS = 26
+N_MFCC = 13
+
+
+def _mel_filterbank(sample_rate, n_fft=N_FFT, n_mels=N_MELS):
+    hz_to_mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    mel_to_hz = lambda mel: 700 * (10 ** (mel / 2595) - 1)
+    mels = np.linspace(hz_to_mel(60), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            bank[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            bank[m - 1, k] = (right - k) / max(1, right - center)
+    return bank
+
+
+_MEL_BANK = _mel_filterbank(SAMPLE_RATE)
+_DCT = np.cos(np.pi / N_MELS * (np.arange(N_MELS) + 0.5)[None, :] * np.arange(N_MFCC)[:, None]).astype(np.float32)
+
+
+def mfcc(samples, sample_rate=SAMPLE_RATE):
+    """ (frames, N_MFCC - 1) cepstra without c0, mean-normalised to remove the microphone's colouring. """
+    x = samples.astype(np.float32) / 32768.0
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+    win, hop = sample_rate * WIN_MS // 1000, sample_rate * HOP_MS // 1000
+    if len(x) < win:
+        x = np.pad(x, (0, win - len(x)))
+    count = 1 + (len(x) - win) // hop
+    frames = np.lib.stride_tricks.as_strided(x, shape=(count, win), strides=(x.strides[0] * hop, x.strides[0]))
+    power = np.abs(np.fft.rfft(frames * np.hamming(win).astype(np.float32), N_FFT)) ** 2
+    bank = _MEL_BANK if sample_rate == SAMPLE_RATE else _mel_filterbank(sample_rate)
+    features = np.log(power @ bank.T + 1e-10) @ _DCT.T
+    features = features[:, 1:]      # c0 is loudness, which says nothing about the word
+    return features - features.mean(axis=0)
+
+
+def subsequence_dtw(template, query):
+    """
+    Mean frame distance of the best alignment of the whole template against any stretch of the
+    query. Steps (1,1), (1,2) and (2,1) bound the warp to half/double speed and only look at
+    earlier template rows, so each row is computed as one vector operation.
+    """
+    n, m = len(template), len(query)
+    if m < n // 2:
+        return np.inf
+    cost = np.sqrt(((template[:, None, :] - query[None, :, :]) ** 2).sum(axis=2)) / np.sqrt(template.shape[1])
+    acc = np.full((n, m), np.inf, dtype=np.float32)
+    acc[0] = cost[0]                            # The match may start anywhere in the query
+    for i in range(1, n):
+        best = np.full(m, np.inf, dtype=np.float32)
+        best[1:] = acc[i - 1, :-1]
+        best[2:] = np.minimum(best[2:], acc[i - 1, :-2])
+        if i >= 2:
+            best[1:] = np.minimum(best[1:], acc[i - 2, :-1])
+        acc[i] = cost[i] + best
+    return float(acc[-1].min() / n)
+
+
+class WakeWordSpotter:
+    def __init__(self, template_dir=TEMPLATE_DIR, threshold=THRESHOLD, max_search_seconds=MAX_SEARCH_SECONDS):
+        self.template_dir = template_dir
+        self.threshold = threshold
+        self.max_search = int(max_search_seconds * SAMPLE_RATE)
+        self.templates = []
+        self.load()
+
+    def load(self):
+        paths = sorted(glob.glob(os.path.join(self.template_dir, "*.wav")))
+        self.templates = [mfcc(WavSource(path).read()) for path in paths]
+        return len(self.templates)
+
+    @property
+    def ready(self):
+        """ False until templates have been enrolled; callers then fall back to ASR text matching. """
+        return bool(self.templates)
+
+    def enroll(self, samples):
+        os.makedirs(self.template_dir, exist_ok=True)
+        path = os.path.join(self.template_dir, f"template_{int(time.time() * 1000)}.wav")
+        write_wav(path, samples)
+        self.templates.append(mfcc(samples))
+        return path
+
+    def score(self, samples):
+        """ Best (lowest) DTW distance over all templates. """
+        features = mfcc(samples[:self.max_search])
+        return min((subsequence_dtw(t, features) for t in self.templates), default=np.inf)
+
+    def detect(self, samples):
+        return self.score(samples) <= self.threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll wake-word templates or watch live scores.")
+    parser.add_argument("command", choices=["enroll", "listen"])
+    parser.add_argument("--count", type=int, default=5, help="templates to record with 'enroll'")
+    parser.add_argument("--templates", default=TEMPLATE_DIR)
+    args = parser.parse_args()
+
+    spotter = WakeWordSpotter(args.templates)
+    endpointer = Endpointer(EnergyVAD())
+    if args.command == "enroll":
+        print(f"🎤 Say the wake word {args.count} times, pausing in between.")
+    else:
+        print(f"🎤 Listening with {len(spotter.templates)} templates (threshold {spotter.threshold}).")
+    for utterance in endpointer.utterances(MicrophoneSource()):
+        if args.command == "enroll":
+            print(f"Saved {spotter.enroll(utterance.samples)}")
+            args.count -= 1
+            if args.count == 0:
+                break
+        else:
+            started = time.perf_counter()
+            score = spotter.score(utterance.samples)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"score {score:.3f} ({'WAKE' if score <= spotter.threshold else 'no'}) in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()